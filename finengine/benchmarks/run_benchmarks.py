@@ -0,0 +1,408 @@
+# ==============================================================
+#  Benchmarks and Golden-Output Checks
+#
+# Reproducible timings for the finance engine (single waterfall,
+# breakeven, run_full_analysis), the /models JSON shaping, end-to-end
+# API latency / throughput under concurrent load (an in-process ASGI
+# client, no server or network) and /search against a small synthetic
+# FAISS index with a deterministic stand-in encoder.
+#
+# Golden checks compare the current results with golden_outputs.json,
+# so a faster engine can be verified against the outputs it replaces.
+# Regenerate the file with --update-golden only after an intended
+# change in results.
+#
+# Usage (from finengine/):
+#   python benchmarks/run_benchmarks.py
+#   python benchmarks/run_benchmarks.py --only engine api --repeat 200
+#   python benchmarks/run_benchmarks.py --executor inline --json results.json
+#   python benchmarks/run_benchmarks.py --update-golden
+# ==============================================================
+
+import argparse
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+GOLDEN_PATH = os.path.join(HERE, "golden_outputs.json")
+SECTIONS = ("engine", "api", "search")
+REL_TOL, ABS_TOL = 1e-9, 1e-6
+KPI_SUBSET = ("scenarios", "roi_percent", "irr_percent", "breakeven_receipts")  # a dashboard tile's fields
+SEARCH_QUERIES = [
+    "a heist that goes wrong", "two rivals fall in love", "a ship lost in deep space",
+    "a family secret comes out", "a detective hunts a killer", "war changes a small town",
+]
+
+
+# -------------------------------------------------------------- inputs
+
+def sample_inputs():
+    import film_finance_model as ffm
+    return copy.deepcopy({
+        'budget': ffm.budget, 'financing': ffm.financing, 'base_case_revenue': ffm.base_case_revenue,
+        'scenario_multipliers': ffm.scenario_multipliers, 'waterfall_terms': ffm.waterfall_terms,
+        'timeline': {**ffm.timeline, 'revenue_recognition_schedule': list(ffm.timeline['revenue_recognition_schedule'])},
+    })
+
+
+def golden_deals():
+    """Fixed deals covering the waterfall's main branches."""
+    sample = sample_inputs()
+    blockbuster = copy.deepcopy(sample)
+    blockbuster['base_case_revenue'] = {'Domestic': 40_000_000, 'Foreign': 65_000_000}
+    flop = copy.deepcopy(sample)
+    flop['base_case_revenue'] = {'Domestic': 250_000, 'Foreign': 400_000}
+    long_tail = copy.deepcopy(sample)
+    long_tail['timeline'] = {**sample['timeline'], 'projection_years': 7,
+                             'revenue_recognition_schedule': [0.35, 0.25, 0.15, 0.1, 0.1, 0.05]}
+    long_tail['waterfall_terms'] = {**sample['waterfall_terms'], 'Net_Profit_Split_To_Investors': 0.35,
+                                    'Talent_Deferrals': 1_500_000}
+    return {'sample': sample, 'blockbuster': blockbuster, 'flop': flop, 'long_tail': long_tail}
+
+
+def api_payload(inputs, title="Benchmark"):
+    return {'title': title, **inputs}
+
+
+# -------------------------------------------------------------- timing
+
+def _stats(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {'n': int(ms.size), 'mean_ms': float(ms.mean()), 'p50_ms': float(np.percentile(ms, 50)),
+            'p95_ms': float(np.percentile(ms, 95)), 'p99_ms': float(np.percentile(ms, 99)), 'min_ms': float(ms.min())}
+
+
+def measure(fn, repeat, warmup=3):
+    for _ in range(warmup):
+        fn()
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - start)
+    return _stats(seconds)
+
+
+async def load_test(client, path, payloads, concurrency, headers):
+    """Sends every payload with at most `concurrency` requests in flight; 503s are counted as rejected."""
+    gate = asyncio.Semaphore(concurrency)
+    seconds, errors, rejected = [], 0, 0
+
+    async def one(payload):
+        nonlocal errors, rejected
+        async with gate:
+            start = time.perf_counter()
+            response = await client.post(path, json=payload, headers=headers)
+            seconds.append(time.perf_counter() - start)
+            rejected += response.status_code == 503
+            errors += response.status_code not in (200, 503)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(p) for p in payloads))
+    wall = time.perf_counter() - start
+    return {**_stats(seconds), 'concurrency': concurrency, 'errors': errors, 'rejected': rejected,
+            'throughput_rps': len(payloads) / wall}
+
+
+# -------------------------------------------------------------- engine
+
+def bench_engine(repeat):
+    import film_report_api as api
+    from breakeven import solve_breakeven, revenue_proportions
+    from fastapi.encoders import jsonable_encoder
+    from film_finance_model import FilmFinanceModel
+    from serializers import dumps_json
+    from waterfall_engine import evaluate_waterfall
+
+    inputs = sample_inputs()
+    fin, terms, tl = inputs['financing'], inputs['waterfall_terms'], inputs['timeline']
+    rev = inputs['base_case_revenue']
+    proportions = revenue_proportions(rev)
+    req = api.ReportRequest(**api_payload(inputs))
+    model = FilmFinanceModel(req.title, inputs)
+    model.run_full_analysis()
+
+    return {
+        'waterfall.single': measure(lambda: evaluate_waterfall(
+            rev['Domestic'], rev['Foreign'], fin, terms, tl['revenue_recognition_schedule'], tl['projection_years']),
+            repeat),
+        'breakeven.roi': measure(lambda: solve_breakeven(
+            proportions, fin, terms, tl['revenue_recognition_schedule'], tl['projection_years']), repeat),
+        'breakeven.irr_target': measure(lambda: solve_breakeven(
+            proportions, fin, terms, tl['revenue_recognition_schedule'], tl['projection_years'], target_irr=0.15),
+            repeat),
+        'model.run_full_analysis': measure(lambda: FilmFinanceModel(req.title, inputs).run_full_analysis(), repeat),
+        'api.chart_payload': measure(lambda: api.chart_payload(model, req), repeat),
+        'api.chart_payload_json': measure(lambda: json.dumps(jsonable_encoder(api.chart_payload(model, req))), repeat),
+        'api.chart_payload_render': measure(lambda: dumps_json(api.chart_payload(model, req)), repeat),
+        'api.chart_payload_kpis': measure(lambda: dumps_json(api.chart_payload(model, req, fields=KPI_SUBSET)), repeat),
+    }
+
+
+def engine_golden():
+    """Current results for the golden deals, as plain JSON-able values."""
+    import film_report_api as api
+    from film_finance_model import FilmFinanceModel
+    from grid_sweep import run_grid
+    from monte_carlo import run_monte_carlo
+    from sensitivity import run_sensitivity
+    from slate_model import run_slate, run_slate_monte_carlo
+
+    golden = {}
+    for name, inputs in golden_deals().items():
+        model = FilmFinanceModel(name, inputs)
+        model.run_full_analysis()
+        golden[name] = {
+            'results': {scenario: {k: np.asarray(v).tolist() for k, v in res.items()}
+                        for scenario, res in model.results.items()},
+            'breakeven_receipts': float(model.breakeven_receipts),
+            'breakeven_targets': {kind: {str(t): float(g) for t, g in values.items()}
+                                  for kind, values in model.breakeven_for_targets([0.2, 0.5], [0.1, 0.25]).items()},
+        }
+
+    inputs = sample_inputs()
+    req = api.ReportRequest(**api_payload(inputs), breakeven_targets={'roi': [0.2], 'irr': [0.15]})
+    model = api.build_model(req)
+    model.run_full_analysis()
+    golden['models_response'] = json.loads(json.dumps(api.chart_payload(model, req), default=float))
+    golden['monte_carlo'] = run_monte_carlo(
+        inputs, {'Domestic': {'dist': 'lognormal', 'mean': 4.5e6, 'sigma': 0.5},
+                 'Foreign': {'dist': 'triangular', 'low': 2e6, 'mode': 6e6, 'high': 1.2e7}},
+        {'dist': 'dirichlet', 'concentration': 20}, n_draws=20_000, seed=7)
+    golden['sensitivity'] = run_sensitivity(inputs)
+    grid = run_grid(inputs, 'base_case_revenue.Domestic', np.linspace(0, 2e7, 5),
+                    'waterfall_terms.Net_Profit_Split_To_Investors', np.linspace(0.2, 0.8, 4),
+                    metrics=('roi', 'irr', 'breakeven_receipts'))
+    golden['grid'] = {k: np.asarray(v).tolist() for k, v in grid.items() if k not in ('x', 'y', 'scenario')}
+    slate = list(golden_deals().values()) * 3
+    golden['slate'] = run_slate(slate, start_years=[i % 3 for i in range(len(slate))])
+    golden['slate_monte_carlo'] = run_slate_monte_carlo(slate, n_draws=2_000, correlation=0.4, seed=11)
+    return golden
+
+
+# -------------------------------------------------------------- search
+
+class HashEncoder:
+    """Deterministic stand-in for the sentence encoder: a unit vector seeded by the text."""
+
+    def __init__(self, dim=64):
+        self.dim = dim
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        vectors = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'little')
+            v = np.random.default_rng(seed).standard_normal(self.dim)
+            vectors[i] = v / np.linalg.norm(v)
+        return vectors
+
+
+def install_synthetic_search(workdir, n_films=5_000, dim=64):
+    """
+    Points semantic_search_api at a synthetic index and metadata (no model
+    download). The attribute arrays are written under `workdir`, which must
+    outlive the search benchmarks since they stay memory-mapped.
+    """
+    import faiss
+    import semantic_search_api as search
+    from search_filters import AttributeIndex, build_attribute_arrays
+    from search_store import open_attribute_store, write_attribute_store
+
+    rng = np.random.default_rng(0)
+    themes = ['love', 'war', 'space', 'crime', 'family', 'heist', 'revenge', 'friendship']
+    overviews = [f"A story about {themes[i % len(themes)]} and {themes[(i * 3 + 1) % len(themes)]}, part {i}"
+                 for i in range(n_films)]
+    revenue = rng.lognormal(16, 1.5, n_films)
+    revenue[rng.random(n_films) < 0.2] = np.nan
+    metadata = {
+        'title': np.array([f"Film {i}" for i in range(n_films)], dtype=object),
+        'overview': np.array(overviews, dtype=object),
+        'cast': np.array([f"Actor {i % 97}, Actor {(i * 7) % 97}" for i in range(n_films)], dtype=object),
+        'director': np.array([f"Director {i % 61}" for i in range(n_films)], dtype=object),
+        'revenue': revenue,
+    }
+    encoder = HashEncoder(dim)
+    index = faiss.IndexFlatL2(dim)
+    index.add(encoder.encode(overviews))
+    # Same memory-mapped attribute arrays as a built artifacts directory
+    attributes_dir = os.path.join(workdir, "attributes")
+    write_attribute_store(build_attribute_arrays(metadata), attributes_dir)
+    attributes = AttributeIndex(metadata['revenue'], open_attribute_store(attributes_dir))
+    search.model, search.faiss_index, search.attribute_index = encoder, index, attributes
+    search.metadata = metadata
+
+
+def search_payloads(n):
+    rng = np.random.default_rng(1)
+    # Mix of repeated queries (cache hits) and unique ones (encode + FAISS)
+    return [{'query': SEARCH_QUERIES[i % len(SEARCH_QUERIES)] if rng.random() < 0.5 else f"query number {i}",
+             'top_n': 10} for i in range(n)]
+
+
+async def search_golden(client, headers):
+    golden = {}
+    for query in SEARCH_QUERIES:
+        for label, options in (('plain', {}), ('filtered', {'min_revenue': 5e6, 'director': 'Director 7'}),
+                               ('hybrid', {'keyword_weight': 0.5})):
+            response = await client.post('/search', json={'query': query, 'top_n': 10, **options}, headers=headers)
+            response.raise_for_status()
+            golden[f"{label}: {query}"] = [r['title'] for r in response.json()['top_results']]
+    return golden
+
+
+# -------------------------------------------------------------- runner
+
+async def bench_services(sections, n_requests, concurrency, headers):
+    import httpx
+    import film_report_api as api
+
+    results, golden = {}, {}
+    async with api.lifespan(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            if "api" in sections:
+                inputs = sample_inputs()
+                misses = []
+                for i in range(n_requests):
+                    # Distinct revenue per request so every call misses the result cache
+                    deal = copy.deepcopy(inputs)
+                    deal['base_case_revenue']['Domestic'] += i + 1
+                    misses.append(api_payload(deal))
+                await load_test(client, '/models', misses[:concurrency], concurrency, headers)  # warm the executor
+                response = await client.post('/models', json={**api_payload(inputs), 'breakeven_targets': {
+                    'roi': [0.2], 'irr': [0.15]}}, headers=headers)
+                response.raise_for_status()
+                golden['api'] = {'/models': response.json()}
+                results['api./models.miss'] = await load_test(client, '/models', misses, concurrency, headers)
+                results['api./models.hit'] = await load_test(
+                    client, '/models', [api_payload(inputs)] * n_requests, concurrency, headers)
+                results['api./models.hit_fields'] = await load_test(
+                    client, '/models?fields=' + ','.join(KPI_SUBSET), [api_payload(inputs)] * n_requests,
+                    concurrency, headers)
+                results['api./models.kpis_batch100'] = await load_test(
+                    client, '/models/batch', [{'items': misses[:100], 'kpis_only': True}] * max(1, n_requests // 50),
+                    concurrency, headers)
+            if "search" in sections:
+                with tempfile.TemporaryDirectory(prefix="finengine-bench-", ignore_cleanup_errors=True) as workdir:
+                    install_synthetic_search(workdir)
+                    golden['search'] = await search_golden(client, headers)
+                    results['search./search'] = await load_test(
+                        client, '/search', search_payloads(n_requests), concurrency, headers)
+                    results['search./search.filtered'] = await load_test(
+                        client, '/search', [{**p, 'min_revenue': 1e6, 'keyword_weight': 0.3}
+                                            for p in search_payloads(n_requests)], concurrency, headers)
+    return results, golden
+
+
+def compare(expected, actual, path="", mismatches=None):
+    """Recursively compares golden values; numbers within REL_TOL/ABS_TOL."""
+    mismatches = [] if mismatches is None else mismatches
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in sorted(set(expected) | set(actual)):
+            if key not in expected or key not in actual:
+                mismatches.append(f"{path}/{key}: missing on one side")
+            else:
+                compare(expected[key], actual[key], f"{path}/{key}", mismatches)
+    elif isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            mismatches.append(f"{path}: length {len(actual)} != {len(expected)}")
+        else:
+            for i, (e, a) in enumerate(zip(expected, actual)):
+                compare(e, a, f"{path}[{i}]", mismatches)
+    elif isinstance(expected, (int, float)) and isinstance(actual, (int, float)) \
+            and not isinstance(expected, bool) and not isinstance(actual, bool):
+        same = (math.isnan(expected) and math.isnan(actual)) or expected == actual \
+            or math.isclose(expected, actual, rel_tol=REL_TOL, abs_tol=ABS_TOL)
+        if not same:
+            mismatches.append(f"{path}: {actual!r} != {expected!r}")
+    elif expected != actual:
+        mismatches.append(f"{path}: {actual!r} != {expected!r}")
+    return mismatches
+
+
+def print_table(results):
+    print(f"{'benchmark':30} {'n':>6} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'failed':>6}")
+    for name, r in results.items():
+        load = f"{r['throughput_rps']:8.1f} {r['errors'] + r['rejected']:6d}" if 'throughput_rps' in r else ""
+        print(f"{name:30} {r['n']:6d} {r['mean_ms']:9.3f} {r['p50_ms']:9.3f} {r['p95_ms']:9.3f} {r['p99_ms']:9.3f} {load}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the finance engine, API and search, and check golden outputs")
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--repeat", type=int, default=100, help="iterations per engine benchmark")
+    parser.add_argument("--requests", type=int, default=400, help="requests per API/search load test")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight during load tests")
+    parser.add_argument("--executor", choices=("process", "thread", "inline"),
+                        help="MODEL_EXECUTOR for the API run (default: environment, else process)")
+    parser.add_argument("--json", help="also write the timings to this file")
+    parser.add_argument("--update-golden", action="store_true", help="rewrite golden_outputs.json from this run")
+    parser.add_argument("--skip-golden", action="store_true")
+    args = parser.parse_args()
+
+    os.environ.setdefault("API_KEY", "benchmark")
+    os.environ["SEARCH_WARMUP"] = "0"
+    # Let the load tests queue on the executor instead of measuring 503 load shedding
+    os.environ.setdefault("MODEL_MAX_PENDING", str(args.concurrency * 2))
+    if args.executor:
+        os.environ["MODEL_EXECUTOR"] = args.executor
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("film_report_api").setLevel(logging.ERROR)
+    headers = {"x-api-key": os.environ["API_KEY"]}
+
+    results, golden = {}, {}
+    if "engine" in args.only:
+        results.update(bench_engine(args.repeat))
+        golden['engine'] = json.loads(json.dumps(engine_golden(), default=float))
+    if "api" in args.only or "search" in args.only:
+        service_results, service_golden = asyncio.run(
+            bench_services(args.only, args.requests, args.concurrency, headers))
+        results.update(service_results)
+        golden.update(service_golden)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+
+    if args.skip_golden:
+        return 0
+    if args.update_golden:
+        stored = {}
+        if os.path.exists(GOLDEN_PATH):
+            with open(GOLDEN_PATH) as f:
+                stored = json.load(f)
+        stored.update(golden)
+        with open(GOLDEN_PATH, "w") as f:
+            json.dump(stored, f, indent=1, sort_keys=True)
+        print(f"Golden outputs updated: {', '.join(sorted(golden))}")
+        return 0
+
+    with open(GOLDEN_PATH) as f:
+        expected = json.load(f)
+    mismatches = []
+    for section, values in golden.items():
+        compare(expected.get(section, {}), values, section, mismatches)
+    if mismatches:
+        print(f"\nGolden check FAILED ({len(mismatches)} differences):")
+        for line in mismatches[:50]:
+            print("  " + line)
+        return 1
+    print(f"\nGolden check passed: {', '.join(sorted(golden))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# ==============================================================
+#  Breakeven Solver
+#
+# With the revenue mix held at the base case proportions, every fee in
+# the waterfall is linear in gross receipts G, so the cash available to
+# the waterfall is X(G) = s * (a*G - c) (s = share of revenue recognised
+# over the schedule). Because later tranches only get paid once earlier
+# ones are cleared, the investor's total return across all years is
+# the single-period waterfall on X:
+#
+#   debt -> equity principal -> equity premium -> deferrals -> profit split
+#
+# which is piecewise linear in G. Any ROI target is met inside exactly
+# one tranche, so the breakeven is solved in closed form there. IRR
+# hurdles (and schedules with negative years, where the single-period
+# view doesn't hold) fall back to a vectorized bisection on the engine.
+# ==============================================================
+
+import numpy as np
+
+from waterfall_engine import evaluate_waterfall, cash_flow_irr, _arr
+
+BISECTION_ITERATIONS = 60
+MAX_BRACKET_DOUBLINGS = 60
+
+
+def revenue_proportions(base_case_revenue):
+    """Share of gross receipts per revenue stream, as used for breakeven."""
+    total = sum(base_case_revenue.values())
+    if total <= 0:
+        raise ValueError("base_case_revenue must sum to a positive amount to derive revenue proportions")
+    return {k: v / total for k, v in base_case_revenue.items()}
+
+
+def _linear_coefficients(proportions, terms):
+    """Net receipts = a*G - c, deferred foreign commission = k*G."""
+    d, f = _arr(proportions['Domestic']), _arr(proportions['Foreign'])
+    foreign_comm = _arr(terms['sa_commission_foreign_percent'])
+    deferral = _arr(terms['sa_commission_foreign_deferral_percent'])
+    a = (1 - _arr(terms['CAM_Fee_Percent'])
+         - d * (_arr(terms['Distribution_Fee_Domestic_Percent']) + _arr(terms['sa_commission_domestic_percent']))
+         - f * (_arr(terms['Distribution_Fee_Foreign_Percent']) + foreign_comm * (1 - deferral)))
+    c = _arr(terms['CAM_Setup_Fee'])
+    k = f * foreign_comm * deferral
+    return a, c, k
+
+
+def _analytic_breakeven(proportions, financing, terms, schedule_total, target_roi):
+    a, c, k = _linear_coefficients(proportions, terms)
+    principal = _arr(financing['Equity_Investment'])
+    premium = principal * _arr(terms['Equity_Premium_Percent'])
+    debt = (_arr(financing['Gap_Financing']) * (1 + _arr(terms['Gap_Financing_Premium_Percent']))
+            + _arr(financing['Debt_Financing']))
+    fixed_deferrals = _arr(terms['Talent_Deferrals']) + _arr(terms['Other_Deferrals'])
+    split = _arr(terms['Net_Profit_Split_To_Investors'])
+    s = schedule_total
+    target_return = principal * (1 + target_roi)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Target reached while principal/premium is being repaid: X(G) = debt + target
+        recoup_g = ((debt + target_return) / s + c) / a
+        recoup_ok = (a > 0) & (s > 0)
+        # Target reached inside the profit split: split * (X(G) - debt - P - Pm - deferrals(G)) = excess
+        profit_slope = s * a - k
+        excess = target_return - principal - premium
+        profit_g = (excess / split + debt + principal + premium + fixed_deferrals + s * c) / profit_slope
+        profit_ok = (split > 0) & (profit_slope > 0) & recoup_ok
+
+    g = np.where(target_return <= principal + premium,
+                 np.where(recoup_ok, recoup_g, np.inf),
+                 np.where(profit_ok, profit_g, np.inf))
+    # ROI is pinned at 0 without equity; any non-positive target is met with no receipts at all
+    g = np.where(principal > 0, g, np.where(target_roi <= 0, 0.0, np.inf))
+    return np.where(target_return <= 0, 0.0, np.maximum(g, 0.0))
+
+
+def _bisect_gross(metric, target, shape, initial_high):
+    """Smallest G with metric(G) >= target, vectorized over `shape`."""
+    low = np.zeros(shape)
+    high = np.broadcast_to(np.maximum(initial_high, 1.0), shape).copy()
+    for _ in range(MAX_BRACKET_DOUBLINGS):
+        short = metric(high) < target
+        if not short.any():
+            break
+        low = np.where(short, high, low)
+        high = np.where(short, high * 2, high)
+    unreachable = metric(high) < target
+    for _ in range(BISECTION_ITERATIONS):
+        mid = 0.5 * (low + high)
+        reached = metric(mid) >= target
+        high = np.where(reached, mid, high)
+        low = np.where(reached, low, mid)
+    return np.where(unreachable, np.inf, high)
+
+
+def solve_breakeven(proportions, financing, terms, schedule, projection_years, target_roi=0.0, target_irr=None):
+    """
+    Minimum gross receipts for the investor to reach `target_roi` (default
+    0%, i.e. breakeven) or, if given, the IRR hurdle `target_irr`.
+
+    All inputs broadcast like evaluate_waterfall; targets may be arrays to
+    solve several hurdles at once. Returns np.inf where the target can't
+    be reached at any level of receipts.
+    """
+    schedule = np.atleast_1d(_arr(schedule))
+    if target_irr is None and np.all(schedule >= 0):
+        return _analytic_breakeven(proportions, financing, terms, schedule.sum(axis=-1), _arr(target_roi))
+
+    other = 1 - _arr(proportions['Domestic']) - _arr(proportions['Foreign'])
+
+    def run(gross):
+        return evaluate_waterfall(gross * _arr(proportions['Domestic']), gross * _arr(proportions['Foreign']),
+                                  financing, terms, schedule, projection_years, other_revenue=gross * other,
+                                  compute_irr=False, line_items=False)
+
+    if target_irr is None:
+        target = _arr(target_roi)
+        metric = lambda gross: run(gross)['roi']
+    else:
+        target = _arr(target_irr)
+        def metric(gross):
+            res = run(gross)
+            return cash_flow_irr(res['cash_flow'], res['total_return'])
+
+    shape = np.broadcast_shapes(target.shape, run(np.zeros(())).get('roi').shape)
+    # Recouping debt plus equity is a natural lower bound for the bracket
+    initial_high = (_arr(financing['Equity_Investment']) + _arr(financing['Debt_Financing'])
+                    + _arr(financing['Gap_Financing']))
+    return _bisect_gross(metric, target, shape, initial_high)
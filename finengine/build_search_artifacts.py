@@ -0,0 +1,69 @@
+"""
+Builds the shared, memory-mappable search artifacts (see search_store.py)
+from the current metadata.pkl and faiss_text_only.idx.
+
+  python build_search_artifacts.py                 # columnar metadata + flat index
+  python build_search_artifacts.py --ivfpq         # also a quantized IVF-PQ index
+
+Select the index at runtime with SEARCH_INDEX_VARIANT=flat|ivfpq.
+"""
+
+import argparse
+import os
+import shutil
+
+import faiss
+import joblib
+import numpy as np
+
+from search_filters import build_attribute_arrays
+from search_store import open_metadata_store, write_attribute_store, write_metadata_store
+
+
+def build_ivfpq(flat_index, nlist=None, m=None, nbits=8):
+    """Trains an IVF-PQ index on the vectors stored in a flat index (same ids, same metric)."""
+    d, n = flat_index.d, flat_index.ntotal
+    vectors = flat_index.reconstruct_n(0, n)
+    # FAISS wants ~39 training points per centroid
+    nlist = nlist or int(max(1, min(4 * np.sqrt(n), n // 39)))
+    m = m or next(c for c in (48, 32, 24, 16, 12, 8, 4, 2, 1) if d % c == 0)
+    metric = flat_index.metric_type
+    quantizer = faiss.IndexFlatIP(d) if metric == faiss.METRIC_INNER_PRODUCT else faiss.IndexFlatL2(d)
+    index = faiss.IndexIVFPQ(quantizer, d, nlist, m, nbits, metric)
+    index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--metadata", default="metadata.pkl")
+    parser.add_argument("--index", default="faiss_text_only.idx")
+    parser.add_argument("--out", default=os.getenv("SEARCH_ARTIFACTS_DIR", "search_artifacts"))
+    parser.add_argument("--ivfpq", action="store_true", help="also build a quantized IVF-PQ index")
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--pq-m", type=int, default=None, help="PQ sub-quantizers (must divide the dimension)")
+    parser.add_argument("--pq-bits", type=int, default=8)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    metadata = joblib.load(args.metadata)
+    write_metadata_store(metadata, os.path.join(args.out, "metadata"))
+    print(f"✅ Columnar metadata written for {len(metadata):,} rows.")
+    # Built from the store just written so postings see the same values as the API
+    write_attribute_store(build_attribute_arrays(open_metadata_store(os.path.join(args.out, "metadata"))),
+                          os.path.join(args.out, "attributes"))
+    print("✅ Director/cast postings and keyword IDF written.")
+
+    shutil.copyfile(args.index, os.path.join(args.out, "index.flat.idx"))
+    if args.ivfpq:
+        flat_index = faiss.read_index(args.index)
+        if flat_index.ntotal != len(metadata):
+            raise SystemExit(f"Index has {flat_index.ntotal} vectors but metadata has {len(metadata)} rows")
+        ivfpq = build_ivfpq(flat_index, args.nlist, args.pq_m, args.pq_bits)
+        faiss.write_index(ivfpq, os.path.join(args.out, "index.ivfpq.idx"))
+        print(f"✅ IVF-PQ index written (nlist={ivfpq.nlist}, m={ivfpq.pq.M}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,22 +17,25 @@
 # Features:
 # - Versatile Input Section for any film project
 # - Multiplier-based scenario generation (Best/Worst Case)
-# - Year-by-year waterfall engine for accurate ROI & IRR
-# - Breakeven analysis
+# - Monte Carlo scenario engine (revenue & timing distributions)
+# - Year-by-year waterfall engine for accurate ROI & IRR (vectorized, see waterfall_engine.py)
+# - Breakeven analysis (closed form over the waterfall tranches, ROI/IRR hurdles)
+# - Sensitivity / tornado analysis
+# - PDF report built fully in memory (charts and document, see report_builder.py)
 #
 # ==============================================================
 
-import pandas as pd
 import numpy as np
-import numpy_financial as npf
-import matplotlib
-matplotlib.use('Agg')  # Use non-GUI backend before importing pyplot
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mticker
-from fpdf import FPDF
 import os
-import webbrowser
 import datetime
+from waterfall_engine import (evaluate_waterfall, annual_waterfall_df as build_annual_waterfall_df,
+                              stack_deal_terms, FINANCING_KEYS, TERM_KEYS)
+from monte_carlo import run_monte_carlo
+from breakeven import solve_breakeven, revenue_proportions
+from result_cache import canonical_key
+from sensitivity import run_sensitivity
+from report_builder import render_charts, build_pdf
+from timers import stage
 
 # ----------------------------------------------------------------------
 # 1. INPUTS SECTION
@@ -65,11 +68,13 @@ timeline = {
 # ----------------------------------------------------------------------
 
 class FilmFinanceModel:
-    def __init__(self, title, inputs):
+    def __init__(self, title, inputs, hurdles=None):
         self.title = title
         self.inputs = inputs
+        self.hurdles = hurdles or None  # e.g. {'roi': [0.2], 'irr': [0.15]}, solved into breakeven_targets
         self.results = {}
-        self.image_files = []
+        self.breakeven_targets = {}
+        self.chart_images = []
         self._generate_scenarios()
 
     def _generate_scenarios(self):
@@ -80,234 +85,246 @@ class FilmFinanceModel:
             'Best Case': {k: v * mult['Best_Case'] for k, v in base_rev.items()}
         }
 
-    def _calculate_time_series_waterfall(self, scenario_revenue):
+    @staticmethod
+    def _revenue_arrays(scenario_revenues):
+        domestic = np.array([rev['Domestic'] for rev in scenario_revenues], dtype=float)
+        foreign = np.array([rev['Foreign'] for rev in scenario_revenues], dtype=float)
+        other = np.array([sum(rev.values()) for rev in scenario_revenues], dtype=float) - domestic - foreign
+        return domestic, foreign, other
+
+    def _evaluate_scenarios(self, scenario_revenues, compute_irr=True, line_items=True):
+        """Runs the waterfall for a list of revenue dicts in one vectorized pass."""
         terms, fin, tl = self.inputs['waterfall_terms'], self.inputs['financing'], self.inputs['timeline']
+        domestic, foreign, other = self._revenue_arrays(scenario_revenues)
+        return evaluate_waterfall(domestic, foreign, fin, terms, tl['revenue_recognition_schedule'],
+                                  tl['projection_years'], other_revenue=other,
+                                  compute_irr=compute_irr, line_items=line_items)
+
+    @staticmethod
+    def _scenario_result(batch, i):
+        return {'roi': float(batch['roi'][i]), 'irr': float(batch['irr'][i]),
+                'cash_flow': batch['cash_flow'][i].tolist(),
+                'total_return': float(batch['total_return'][i]),
+                'gross_receipts': float(batch['gross_receipts'][i]),
+                'annual_waterfall': batch['annual_waterfall'][i]}
 
-        equity_principal = fin['Equity_Investment']
-        equity_premium = equity_principal * terms['Equity_Premium_Percent']
-        total_debt_outstanding = (fin['Gap_Financing'] * (1 + terms['Gap_Financing_Premium_Percent'])) + fin['Debt_Financing']
-        foreign_comm_total = scenario_revenue['Foreign'] * terms['sa_commission_foreign_percent']
-        foreign_comm_deferred = foreign_comm_total * terms['sa_commission_foreign_deferral_percent']
-        total_deferrals_outstanding = terms['Talent_Deferrals'] + terms['Other_Deferrals'] + foreign_comm_deferred
-        equity_principal_outstanding = equity_principal
-        equity_premium_outstanding = equity_premium
-
-        equity_investor_cf = [-equity_principal] + [0] * (tl['projection_years'] - 1)
-
-        gross_receipts = sum(scenario_revenue.values())
-        cam_fee = terms['CAM_Setup_Fee'] + (gross_receipts * terms['CAM_Fee_Percent'])
-        dist_exp = (scenario_revenue['Domestic'] * terms['Distribution_Fee_Domestic_Percent'] +
-                    scenario_revenue['Foreign'] * terms['Distribution_Fee_Foreign_Percent'])
-        domestic_comm = scenario_revenue['Domestic'] * terms['sa_commission_domestic_percent']
-        foreign_comm_upfront = foreign_comm_total - foreign_comm_deferred
-        total_upfront_fees = cam_fee + dist_exp + domestic_comm + foreign_comm_upfront
-        total_net_receipts = gross_receipts - total_upfront_fees
-
-        annual_waterfall_df = pd.DataFrame(index=[
-            'Net Receipts This Year', 'Less: Paid to Debt', 'Less: Paid to Equity Principal',
-            'Less: Paid to Equity Premium', 'Less: Paid to Deferrals', 'Investor Profit Share',
-            'Total Cash to Investor This Year'
-        ], columns=[f'Year {i+1}' for i in range(len(tl['revenue_recognition_schedule']))], dtype=float).fillna(0)
-
-        for i, p in enumerate(tl['revenue_recognition_schedule']):
-            year_col = f'Year {i+1}'
-            receipts_this_year = total_net_receipts * p
-            annual_waterfall_df.loc['Net Receipts This Year', year_col] = receipts_this_year
-
-            paid_to_debt = min(receipts_this_year, total_debt_outstanding)
-            total_debt_outstanding -= paid_to_debt
-            receipts_this_year -= paid_to_debt
-            annual_waterfall_df.loc['Less: Paid to Debt', year_col] = -paid_to_debt
-
-            paid_to_equity_principal = min(receipts_this_year, equity_principal_outstanding)
-            equity_principal_outstanding -= paid_to_equity_principal
-            receipts_this_year -= paid_to_equity_principal
-            equity_investor_cf[i+1] += paid_to_equity_principal
-            annual_waterfall_df.loc['Less: Paid to Equity Principal', year_col] = -paid_to_equity_principal
-
-            paid_to_equity_premium = min(receipts_this_year, equity_premium_outstanding)
-            equity_premium_outstanding -= paid_to_equity_premium
-            receipts_this_year -= paid_to_equity_premium
-            equity_investor_cf[i+1] += paid_to_equity_premium
-            annual_waterfall_df.loc['Less: Paid to Equity Premium', year_col] = -paid_to_equity_premium
-
-            paid_to_deferrals = min(receipts_this_year, total_deferrals_outstanding)
-            total_deferrals_outstanding -= paid_to_deferrals
-            receipts_this_year -= paid_to_deferrals
-            annual_waterfall_df.loc['Less: Paid to Deferrals', year_col] = -paid_to_deferrals
-
-            investor_profit_share = receipts_this_year * terms['Net_Profit_Split_To_Investors']
-            equity_investor_cf[i+1] += investor_profit_share
-            annual_waterfall_df.loc['Investor Profit Share', year_col] = investor_profit_share
-
-            annual_waterfall_df.loc['Total Cash to Investor This Year', year_col] = equity_investor_cf[i+1]
-
-        total_investor_return = sum(equity_investor_cf[1:])
-        roi = (total_investor_return - equity_principal) / equity_principal if equity_principal > 0 else 0
-        irr = npf.irr(equity_investor_cf) if total_investor_return > 0 else -1.0
-
-        return {'roi': roi, 'irr': irr, 'cash_flow': equity_investor_cf,
-                'total_return': total_investor_return, 'gross_receipts': gross_receipts,
-                'annual_waterfall_df': annual_waterfall_df}
-
-    def _calculate_breakeven(self):
-        base_rev_total = sum(self.inputs['base_case_revenue'].values())
-        proportions = {k: v / base_rev_total for k, v in self.inputs['base_case_revenue'].items()}
-        low_guess, high_guess = 1_000_000, 25_000_000
-        for _ in range(25):
-            mid_guess = (low_guess + high_guess) / 2
-            roi = self._calculate_time_series_waterfall({k: mid_guess * p for k, p in proportions.items()})['roi']
-            if roi < 0: low_guess = mid_guess
-            else: high_guess = mid_guess
-        return high_guess
-
-    def run_full_analysis(self):
-        for name, revenue_data in self.generated_scenarios.items():
-            self.results[name] = self._calculate_time_series_waterfall(revenue_data)
-
-        self.breakeven_receipts = self._calculate_breakeven()
-        self.base_case_cash_flow_df = pd.DataFrame(
-            self.results['Base Case']['cash_flow'],
-            index=[f'Year {i}' for i in range(self.inputs['timeline']['projection_years'])],
-            columns=['Net Cash Flow to Equity']
+    def _calculate_time_series_waterfall(self, scenario_revenue):
+        return self._scenario_result(self._evaluate_scenarios([scenario_revenue]), 0)
+
+    def _calculate_breakeven(self, target_roi=0.0, target_irr=None):
+        """Gross receipts needed to reach a target ROI (default: breakeven) or IRR hurdle (see breakeven.py)."""
+        tl = self.inputs['timeline']
+        return solve_breakeven(
+            revenue_proportions(self.inputs['base_case_revenue']), self.inputs['financing'],
+            self.inputs['waterfall_terms'], tl['revenue_recognition_schedule'], tl['projection_years'],
+            target_roi=target_roi, target_irr=target_irr
         )
-        self.base_case_cash_flow_df['Cumulative Cash Flow'] = self.base_case_cash_flow_df['Net Cash Flow to Equity'].cumsum()
-
-    def generate_charts(self):
-        """
-        **RESTORED**
-        Generates and saves all three analytical charts as image files.
-        """
-        plt.style.use('seaborn-v0_8-whitegrid')
-        money_format = mticker.FuncFormatter(lambda x, p: f'${x/1e6:.1f}M')
-
-        # Chart 1: ROI Chart
-        fig1, ax1 = plt.subplots(figsize=(7, 5))
-        roi_data = [self.results[s]['roi'] * 100 for s in self.results]
-        colors = ['#d9534f', '#777777', '#5cb85c']
-        ax1.bar(self.results.keys(), roi_data, color=colors)
-        ax1.set_title(f'Investor ROI by Scenario for "{self.title}"', fontsize=14, pad=20)
-        ax1.set_ylabel('Return on Investment (ROI %)')
-        ax1.yaxis.set_major_formatter(mticker.PercentFormatter())
-        fname1 = "chart_roi_scenario.png"
-        plt.savefig(fname1, bbox_inches='tight')
-        plt.close(fig1)
-        self.image_files.append(fname1)
-
-        # Chart 2: Return Composition Chart
-        fig2, ax2 = plt.subplots(figsize=(8, 5))
-        equity_principal = self.inputs['financing']['Equity_Investment']
-        df = pd.DataFrame({
-            'Principal Recouped': [min(equity_principal, r['total_return']) for r in self.results.values()],
-            'Profit (Premium & Split)': [max(0, r['total_return'] - equity_principal) for r in self.results.values()],
-        }, index=self.results.keys())
-        df.plot(kind='bar', stacked=True, ax=ax2, color=['#3498db', '#2ecc71'])
-        ax2.set_title('Composition of Investor Returns by Scenario', fontsize=14, pad=20)
-        ax2.set_ylabel('Total Return (USD)')
-        ax2.yaxis.set_major_formatter(money_format)
-        ax2.tick_params(axis='x', rotation=0)
-        fname2 = "chart_return_composition.png"
-        plt.savefig(fname2, bbox_inches='tight')
-        plt.close(fig2)
-        self.image_files.append(fname2)
-
-        # Chart 3: Cash Flow Chart
-        fig3, ax3 = plt.subplots(figsize=(8, 5))
-        cash_flow_to_plot = self.base_case_cash_flow_df['Cumulative Cash Flow']
-        cash_flow_to_plot.plot(ax=ax3, marker='o', label='Cumulative Cash Flow')
-        ax3.set_title('Base Case Cumulative Cash Flow to Equity', fontsize=14, pad=20)
-        ax3.set_ylabel('Amount (USD)')
-        ax3.set_xlabel('Year')
-        ax3.axhline(0, color='grey', linestyle='--')
-        ax3.yaxis.set_major_formatter(money_format)
-        ax3.legend()
-        fname3 = "chart_cash_flow.png"
-        plt.savefig(fname3, bbox_inches='tight')
-        plt.close(fig3)
-        self.image_files.append(fname3)
-
-    def generate_pdf_report(self):
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_auto_page_break(auto=True, margin=15)
-
-        def create_pdf_table(pdf_obj, df, title):
-            pdf_obj.set_font("Arial", 'B', 12)
-            pdf_obj.cell(0, 10, title, ln=True, align='L')
-            pdf_obj.set_font("Arial", 'B', 9)
-
-            col_widths = {'index': 70}
-            other_cols_width = (pdf_obj.w - pdf_obj.l_margin - pdf_obj.r_margin - col_widths['index']) / len(df.columns)
-            for col in df.columns: col_widths[col] = other_cols_width
-
-            pdf_obj.cell(col_widths['index'], 8, df.index.name or '', border=1, align='C')
-            for col in df.columns: pdf_obj.cell(col_widths[col], 8, str(col), border=1, align='C')
-            pdf_obj.ln()
-
-            for index, row in df.iterrows():
-                font_style = 'B' if 'Total' in str(index) else ''
-                pdf_obj.set_font("Arial", font_style, 9)
-                pdf_obj.cell(col_widths['index'], 8, str(index), border=1, align='L')
-                for col_name, item in row.items():
-                    text = f"{item:,.0f}" if isinstance(item, (int, float, np.number)) else str(item)
-                    if '%' not in text and 'N/A' not in text:
-                        text = text.replace('$-', '-$')
-                    pdf_obj.cell(col_widths[col_name], 8, text, border=1, align='R')
-                pdf_obj.ln()
-            pdf_obj.set_font("Arial", '', 9)
-            pdf_obj.ln(8)
-
-        # --- PDF Content Generation ---
-        pdf.set_font("Arial", 'B', 18)
-        pdf.cell(0, 10, f'Advanced Film Finance Analysis: "{self.title}"', ln=True, align='C')
-        pdf.ln(5)
-
-        # Page 1: KPIs, Breakeven
-        pdf.set_font("Arial", 'B', 14)
-        pdf.cell(0, 10, "1. Key Performance Indicators (KPIs)", ln=True)
-        kpi_df = pd.DataFrame({
-            'Gross Receipts': [res['gross_receipts'] for res in self.results.values()],
-            'Total Investor Return': [res['total_return'] for res in self.results.values()],
-            'Investor ROI': [f"{res['roi']:.1%}" for res in self.results.values()],
-            'Investor IRR': [f"{res['irr']:.1%}" if res['irr'] != -1.0 else "N/A" for res in self.results.values()]
-        }, index=self.results.keys())
-        create_pdf_table(pdf, kpi_df, "Scenario Summary")
-
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(0, 10, "Breakeven Analysis", ln=True)
-        pdf.set_font("Arial", '', 10)
-        pdf.cell(0, 6, f"The film requires estimated Gross Receipts of ${self.breakeven_receipts:,.0f} to break even (0% ROI).", ln=True)
-        pdf.ln(10)
-
-        # Page 2: Annual Waterfall Tables
-        pdf.add_page()
-        pdf.set_font("Arial", 'B', 14)
-        pdf.cell(0, 10, "2. Detailed Annual Waterfall (Year-by-Year)", ln=True)
-        for name, result in self.results.items():
-            create_pdf_table(pdf, result['annual_waterfall_df'], f"Analysis for: {name}")
-
-        # Page 3: Charts
-        pdf.add_page()
-        pdf.set_font("Arial", 'B', 14)
-        pdf.cell(0, 10, "3. Analytical Charts", ln=True)
-        pdf.ln(5)
-        for image in self.image_files:
-            pdf.image(image, w=pdf.w - pdf.l_margin - pdf.r_margin)
-            pdf.ln(5)
-
-        # --- Finalize ---
-        pdf_file = f"{self.title.replace(' ', '_')}_Advanced_Finance_Report.pdf"
-        pdf.output(pdf_file)
-        print(f"\n✅ PDF report saved as '{pdf_file}'.")
-        webbrowser.open_new(f"file://{os.path.abspath(pdf_file)}")
-        for img in self.image_files: os.remove(img)
-        print(" Cleaned up temporary image files.")
+
+    def breakeven_for_targets(self, target_rois=(), target_irrs=()):
+        """Breakeven gross receipts for several ROI and IRR hurdles at once."""
+        targets = {}
+        if len(target_rois):
+            targets['roi'] = dict(zip(target_rois, self._calculate_breakeven(target_roi=np.asarray(target_rois)).tolist()))
+        if len(target_irrs):
+            targets['irr'] = dict(zip(target_irrs, self._calculate_breakeven(target_irr=np.asarray(target_irrs)).tolist()))
+        return targets
+
+    def annual_waterfall_df(self, scenario_name):
+        """Annual line-item table for one scenario, built on demand."""
+        return build_annual_waterfall_df(self.results[scenario_name]['annual_waterfall'])
+
+    def _solve_hurdles(self):
+        if not self.hurdles:
+            return {}
+        return self.breakeven_for_targets(self.hurdles.get('roi', []), self.hurdles.get('irr', []))
+
+    def _store_results(self, names, batch, breakeven_receipts, breakeven_targets=None):
+        self.results = {name: self._scenario_result(batch, i) for i, name in enumerate(names)}
+        self.breakeven_receipts = float(breakeven_receipts)
+        self.breakeven_targets = breakeven_targets or {}
+        self.raw_results = (names, batch, self.breakeven_receipts, self.breakeven_targets)
+        self._base_case_cash_flow_df = None
+
+    def apply_results(self, raw_results, cache=None, key=None):
+        """Loads results computed elsewhere (e.g. an executor worker) and caches them under `key`."""
+        self._store_results(*raw_results)
+        if cache is not None and key is not None:
+            self._save_cached(cache, key, *raw_results)
+
+    def load_cached(self, cache):
+        """Returns (hit, key); restores results on a hit, key is None when there's no cache."""
+        if cache is None or not cache.enabled:
+            return False, None
+        # Hurdle solves are part of the cached results, so the requested hurdles are part of the key
+        key = canonical_key({'inputs': self.inputs, 'hurdles': self.hurdles} if self.hurdles else self.inputs)
+        cached = cache.get(key)
+        if cached is None:
+            return False, key
+        self._store_results(*cached)
+        return True, key
+
+    @staticmethod
+    def _save_cached(cache, key, names, batch, breakeven_receipts, breakeven_targets=None):
+        frozen = {}
+        for k, v in batch.items():
+            frozen[k] = np.array(v)
+            frozen[k].setflags(write=False)
+        cache.put(key, (names, frozen, float(breakeven_receipts), breakeven_targets or {}))
+
+    def run_full_analysis(self, cache=None):
+        hit, key = self.load_cached(cache)
+        if hit:
+            return
+        names = list(self.generated_scenarios.keys())
+        with stage('waterfall'):
+            batch = self._evaluate_scenarios([self.generated_scenarios[name] for name in names])
+        with stage('breakeven'):
+            breakeven = self._calculate_breakeven()
+            targets = self._solve_hurdles()
+        self._store_results(names, batch, breakeven, targets)
+        if key is not None:
+            self._save_cached(cache, key, names, batch, breakeven, targets)
+
+    @property
+    def base_case_cash_flow_df(self):
+        """Base case investor cash flow table, built on first access."""
+        if getattr(self, '_base_case_cash_flow_df', None) is None:
+            import pandas as pd
+            df = pd.DataFrame(
+                self.results['Base Case']['cash_flow'],
+                index=[f'Year {i}' for i in range(self.inputs['timeline']['projection_years'])],
+                columns=['Net Cash Flow to Equity']
+            )
+            df['Cumulative Cash Flow'] = df['Net Cash Flow to Equity'].cumsum()
+            self._base_case_cash_flow_df = df
+        return self._base_case_cash_flow_df
+
+    def _batch_key(self):
+        """Deals sharing this key can be stacked into a single engine call."""
+        missing = ([k for k in FINANCING_KEYS if k not in self.inputs['financing']]
+                   + [k for k in TERM_KEYS if k not in self.inputs['waterfall_terms']]
+                   + [k for k in ('Domestic', 'Foreign') if k not in self.inputs['base_case_revenue']])
+        if missing:
+            raise ValueError(f"Missing inputs: {', '.join(missing)}")
+        tl = self.inputs['timeline']
+        return (tl['projection_years'], len(tl['revenue_recognition_schedule']), tuple(self.generated_scenarios))
+
+    def run_monte_carlo(self, revenue_distributions, schedule_distribution=None, n_draws=100_000, seed=None):
+        """Stochastic alternative to the fixed Worst/Base/Best scenarios (see monte_carlo.py)."""
+        self.monte_carlo_results = run_monte_carlo(
+            self.inputs, revenue_distributions, schedule_distribution, n_draws=n_draws, seed=seed
+        )
+        return self.monte_carlo_results
+
+    def run_sensitivity(self, bump=0.10, parameters=None, scenario='Base Case'):
+        """Tornado table of ROI/IRR/breakeven changes for +/- bump on each input (see sensitivity.py)."""
+        self.sensitivity_results = run_sensitivity(self.inputs, bump, parameters, scenario)
+        return self.sensitivity_results
+
+    def generate_charts(self, map_fn=map):
+        """Renders the three analytical charts to in-memory PNGs (see report_builder.py)."""
+        self.chart_images = render_charts(self, map_fn)
+        return self.chart_images
+
+    def generate_pdf_report(self, path=None):
+        """Builds the PDF report in memory; returns its bytes and also writes them to `path` if given."""
+        if not self.chart_images:
+            self.generate_charts()
+        pdf_bytes = build_pdf([(self, self.chart_images)])
+        if path is not None:
+            with open(path, 'wb') as fh:
+                fh.write(pdf_bytes)
+        return pdf_bytes
+
+def _run_batch_group(models, cache=None, keys=None):
+    names = list(models[0].generated_scenarios)
+    tl = models[0].inputs['timeline']
+    revenue = [FilmFinanceModel._revenue_arrays([m.generated_scenarios[n] for n in names]) for m in models]
+    domestic, foreign, other = (np.stack(arrays) for arrays in zip(*revenue))
+    fin = stack_deal_terms([m.inputs['financing'] for m in models], FINANCING_KEYS)
+    terms = stack_deal_terms([m.inputs['waterfall_terms'] for m in models], TERM_KEYS)
+    schedule = np.array([m.inputs['timeline']['revenue_recognition_schedule'] for m in models], dtype=float)
+
+    with stage('waterfall'):
+        batch = evaluate_waterfall(domestic, foreign, {k: v[:, None] for k, v in fin.items()},
+                                   {k: v[:, None] for k, v in terms.items()}, schedule[:, None, :],
+                                   tl['projection_years'], other_revenue=other)
+    with stage('breakeven'):
+        proportions = [revenue_proportions(m.inputs['base_case_revenue']) for m in models]
+        breakeven = solve_breakeven({k: np.array([p[k] for p in proportions]) for k in ('Domestic', 'Foreign')},
+                                    fin, terms, schedule, tl['projection_years'])
+        targets = [m._solve_hurdles() for m in models]
+    for j, model in enumerate(models):
+        model_batch = {k: v[j] for k, v in batch.items()}
+        model._store_results(names, model_batch, breakeven[j], targets[j])
+        if keys is not None and keys[j] is not None:
+            FilmFinanceModel._save_cached(cache, keys[j], names, model_batch, breakeven[j], targets[j])
+
+
+def run_batch_analysis(models, cache=None):
+    """
+    Equivalent to calling run_full_analysis on every model, but deals with
+    the same timeline shape are stacked and run through the engine together.
+    Returns a list aligned with `models`: None on success, else the exception.
+    """
+    errors = [None] * len(models)
+    groups = {}
+    keys = [None] * len(models)
+    for i, model in enumerate(models):
+        try:
+            group_key = model._batch_key()
+            hit, keys[i] = model.load_cached(cache)
+            if hit:
+                continue
+            groups.setdefault(group_key, []).append(i)
+        except Exception as e:
+            errors[i] = e
+    for idxs in groups.values():
+        try:
+            _run_batch_group([models[i] for i in idxs], cache, [keys[i] for i in idxs])
+        except Exception:
+            # Fall back to one run per deal so a bad deal only fails itself
+            for i in idxs:
+                try:
+                    models[i].run_full_analysis(cache)
+                except Exception as e:
+                    errors[i] = e
+    return errors
+
+def analyse_inputs(inputs, hurdles=None):
+    """Picklable entry point for executor workers: runs the analysis and returns the raw results."""
+    model = FilmFinanceModel('', inputs, hurdles)
+    model.run_full_analysis()
+    return model.raw_results
+
+
+def analyse_batch(inputs_list, hurdles_list=None):
+    """Batch counterpart of analyse_inputs; failed deals come back as their exception."""
+    models, outcomes = [], []
+    for inputs, hurdles in zip(inputs_list, hurdles_list or [None] * len(inputs_list)):
+        try:
+            models.append(FilmFinanceModel('', inputs, hurdles))
+            outcomes.append(None)
+        except Exception as e:
+            outcomes.append(e)
+    errors = iter(run_batch_analysis(models))
+    built = iter(models)
+    for i, outcome in enumerate(outcomes):
+        if outcome is None:
+            model, error = next(built), next(errors)
+            outcomes[i] = error if error is not None else model.raw_results
+    return outcomes
 
 if __name__ == "__main__":
+    import webbrowser
+
     model = FilmFinanceModel(FILM_TITLE, {
         'budget': budget, 'financing': financing, 'base_case_revenue': base_case_revenue,
         'scenario_multipliers': scenario_multipliers, 'waterfall_terms': waterfall_terms, 'timeline': timeline
     })
     model.run_full_analysis()
     model.generate_charts()
-    model.generate_pdf_report()
\ No newline at end of file
+    pdf_file = f"{model.title.replace(' ', '_')}_Advanced_Finance_Report.pdf"
+    model.generate_pdf_report(pdf_file)
+    print(f"\n✅ PDF report saved as '{pdf_file}'.")
+    webbrowser.open_new(f"file://{os.path.abspath(pdf_file)}")
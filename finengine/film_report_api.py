@@ -1,22 +1,43 @@
 # FastAPI-based API for Film Finance Data (JSON Charts)
 
-from fastapi import FastAPI, HTTPException, Header, HTTPException, Depends
-from pydantic import BaseModel
-from typing import Dict, List, Union
-from film_finance_model import FilmFinanceModel  # assume your main logic is moved into this module
+from fastapi import FastAPI, HTTPException, Header, HTTPException, Depends, Query
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Dict, List, Union
+from film_finance_model import FilmFinanceModel, analyse_inputs, analyse_batch  # assume your main logic is moved into this module
+from monte_carlo import run_monte_carlo
+from sensitivity import run_sensitivity
+from forecast import run_comparable_forecast
+from grid_sweep import run_grid, axis_values, MAX_GRID_CELLS
+from slate_model import run_slate, run_slate_monte_carlo
+from report_builder import chart_inputs, render_chart, analyse_and_render, build_report_pdf
+from report_jobs import ReportJobs
+from model_executor import ModelExecutor, ExecutorBusy
+from waterfall_engine import LINE_ITEMS
+from result_cache import ResultCache
+from metrics import MetricsMiddleware, RequestProfiler, TimedRoute, render_metrics
+from timers import stage
+from serializers import negotiated_response
+import numpy as np
 from fastapi.middleware.cors import CORSMiddleware
 import logging
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from fastapi.requests import Request
 import os
 from typing import Optional
 from dotenv import load_dotenv
-from semantic_search_api import router as similarity_router
+from semantic_search_api import router as similarity_router, start_warmup as start_search_warmup, search_readiness
+import semantic_search_api as search
 load_dotenv()
 
 
 API_KEY = os.getenv("API_KEY")
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "1000"))
+SEARCH_WARMUP = os.getenv("SEARCH_WARMUP", "1") != "0"  # 0: load search resources on first /search
+TIMING_HEADERS = os.getenv("TIMING_HEADERS", "0") == "1"  # Server-Timing header with per-stage timings
+BATCH_CHUNK_MIN = 32  # below this, IPC costs more than a worker saves
 
 if not API_KEY:
     raise RuntimeError("Missing required environment variable: API_KEY")
@@ -30,7 +51,20 @@ def verify_api_key(x_api_key: Optional[str] = Header(None)):
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+result_cache = ResultCache.from_env()
+model_executor = ModelExecutor.from_env()
+report_jobs = ReportJobs.from_env()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    model_executor.start()
+    if SEARCH_WARMUP:
+        start_search_warmup()
+    yield
+    model_executor.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+app.router.route_class = TimedRoute
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # or ["*"] for all origins
@@ -39,6 +73,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware, timing_headers=TIMING_HEADERS, profiler=RequestProfiler.from_env())
+
 app.include_router(similarity_router)
 
 class ReportRequest(BaseModel):
@@ -49,6 +85,73 @@ class ReportRequest(BaseModel):
     scenario_multipliers: Dict[str, float]
     waterfall_terms: Dict[str, Union[float, int]]
     timeline: Dict[str, Union[int, List[float]]]
+    breakeven_targets: Optional[Dict[str, List[float]]] = None  # e.g. {"roi": [0.2], "irr": [0.15]}
+
+class MonteCarloRequest(ReportRequest):
+    revenue_distributions: Dict[str, Dict[str, Union[str, float, List[float]]]]
+    schedule_distribution: Optional[Dict[str, Union[str, float]]] = None
+    n_draws: int = 100_000
+    seed: Optional[int] = None
+
+class SensitivityRequest(ReportRequest):
+    bump_percent: float = 10.0
+    parameters: Optional[List[str]] = None  # "section.key" names, default: every numeric input
+    scenario: str = "base_case"
+
+class GridAxis(BaseModel):
+    parameter: str  # "section.key", e.g. "base_case_revenue.Domestic"
+    values: Optional[List[float]] = Field(None, max_length=MAX_GRID_CELLS)  # explicit values, or start/stop/steps (inclusive)
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    steps: Optional[int] = Field(None, ge=1, le=MAX_GRID_CELLS)
+
+class GridRequest(ReportRequest):
+    x: GridAxis
+    y: GridAxis
+    metrics: List[str] = ["roi", "irr"]  # also "total_return", "breakeven_receipts"
+    scenario: str = "base_case"
+    format: str = "json"  # "json" (one row-major matrix per metric) or "binary" (float32 arrays)
+
+class ForecastRequest(search.SearchOptions):
+    title: str
+    logline: str
+    top_k: int = Field(25, ge=1, le=500)
+    budget: Dict[str, float]
+    financing: Dict[str, float]
+    base_case_revenue: Dict[str, float]  # only the Domestic/Foreign mix is used to split comparable revenue
+    waterfall_terms: Dict[str, Union[float, int]]
+    timeline: Dict[str, Union[int, List[float]]]
+    revenue_scale: float = Field(1.0, gt=0)  # comparable revenue -> gross receipts for this deal
+
+class SlateReportRequest(BaseModel):
+    items: List[ReportRequest]
+    title: str = "Slate"
+
+class SlateShocks(BaseModel):
+    n_draws: int = 10_000
+    sigma: Union[float, List[float]] = 0.5  # log-space std of each film's revenue shock (one value or one per film)
+    correlation: float = Field(0.3, ge=0, le=1)  # pairwise correlation of the films' log shocks
+    seed: Optional[int] = None
+
+class SlateRequest(BaseModel):
+    items: List[ReportRequest]
+    start_years: Optional[List[int]] = None  # year offset of each film's equity outlay, default all 0
+    scenario: str = "base_case"
+    monte_carlo: Optional[SlateShocks] = None
+
+class BatchReportRequest(BaseModel):
+    items: List[Dict[str, Any]]  # ReportRequest payloads, validated per item
+    kpis_only: bool = False
+    fields: Optional[List[str]] = None  # as /models?fields=, overrides kpis_only
+
+@app.exception_handler(ExecutorBusy)
+async def executor_busy_handler(request: Request, exc: ExecutorBusy):
+    logger.warning("503 Model executor at capacity for request to %s", request.url)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -60,96 +163,457 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={"detail": exc.errors()}
     )
 
-@app.post("/models")
-def generate_chart_data(req: ReportRequest, auth=Depends(verify_api_key)):
-    try:
-        model = FilmFinanceModel(req.title, {
+def build_model(req: ReportRequest, fields=None) -> FilmFinanceModel:
+    """`fields` is the chart_payload selection; hurdles are only solved when breakeven_targets is in it."""
+    wants_targets = fields is None or "breakeven_targets" in fields
+    # Timed here only: executor workers rebuild the scenarios from the same inputs
+    with stage("scenarios"):
+        return FilmFinanceModel(req.title, {
             "budget": req.budget,
             "financing": req.financing,
             "base_case_revenue": req.base_case_revenue,
             "scenario_multipliers": req.scenario_multipliers,
             "waterfall_terms": req.waterfall_terms,
             "timeline": req.timeline
-        })
-        model.run_full_analysis()
+        }, hurdles=req.breakeven_targets if wants_targets else None)
 
-        scenario_names = list(model.results.keys())
-        scenario_keys = [name.lower().replace(" ", "_") for name in scenario_names]
+KPI_FIELDS = ("scenarios", "scenario_labels", "roi_percent", "irr_percent", "breakeven_receipts",
+              "scenario_summary", "breakeven_targets")
+CHART_FIELDS = KPI_FIELDS + ("roi_series", "irr_series", "cash_flows", "investor_composition", "annual_waterfalls")
+# Opt-in only: annual waterfalls as one (line item, year) matrix per scenario instead of nested dicts
+EXTRA_FIELDS = ("annual_waterfall_matrix",)
 
-        roi_percent = [round(model.results[s]['roi'] * 100, 2) for s in scenario_names]
-        irr_percent = [round(model.results[s]['irr'] * 100, 2) if model.results[s]['irr'] >= 0 else None for s in scenario_names]
+def parse_fields(fields):
+    """Validates a `fields` selection (list or comma-separated string); None means every default field."""
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    selected = [f.strip() for f in fields if f.strip()]
+    unknown = [f for f in selected if f not in CHART_FIELDS + EXTRA_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}; "
+                                                    f"valid fields are {', '.join(CHART_FIELDS + EXTRA_FIELDS)}")
+    return selected
 
-        for sname in scenario_names:
-            logger.debug(f"{sname} investor_returns: {model.results[sname]}")
+def finite(value, digits=None):
+    """Rounded value, or None for NaN/inf (e.g. IRR without equity), so every serializer writes null."""
+    value = float(value)
+    return round(value, digits) if np.isfinite(value) else None
 
-        equity_principal = model.inputs['financing']['Equity_Investment']
-        investor_composition = {}
-
-        for scenario_key, scenario_data in model.results.items():
-            total_return = scenario_data.get('total_return', 0)
-            principal = min(equity_principal, total_return)
-            profit = max(0, total_return - equity_principal)
-            investor_composition[scenario_key.lower().replace(" ", "_")] = {
-                "principal": round(principal),
-                "profit": round(profit)
-            }
+def chart_payload(model: FilmFinanceModel, req: ReportRequest, kpis_only: bool = False, fields=None):
+    """
+    Shapes an analysed model into the /models response. Only the sections
+    in `fields` (default: all of CHART_FIELDS, or KPI_FIELDS if kpis_only)
+    are built.
+    """
+    wanted = set(fields if fields is not None else KPI_FIELDS if kpis_only else CHART_FIELDS)
+    scenario_names = list(model.results.keys())
+    scenario_keys = [name.lower().replace(" ", "_") for name in scenario_names]
+    results = [model.results[s] for s in scenario_names]
 
-        logger.debug(f"investor composition {investor_composition}")
+    if logger.isEnabledFor(logging.DEBUG):
+        for sname, result in zip(scenario_names, results):
+            logger.debug("%s investor_returns: %s", sname, result)
 
-        # After investor_composition, before return
-        annual_waterfalls = {}
-        for scenario_key, scenario_data in model.results.items():
-            waterfall_df = scenario_data.get("annual_waterfall_df")
-            if waterfall_df is not None:
-                transposed_df = waterfall_df.transpose()
-                transposed_df.index.name = "Line Item"
-                annual_waterfalls[scenario_key.lower().replace(" ", "_")] = (
-                    transposed_df.round(0).fillna(0).to_dict(orient="index")
-                )
+    payload = {}
+    if "scenarios" in wanted:
+        payload["scenarios"] = scenario_keys
+    if "scenario_labels" in wanted:
+        payload["scenario_labels"] = dict(zip(scenario_keys, scenario_names))
+    if wanted & {"roi_percent", "roi_series"}:
+        roi_percent = [finite(r['roi'] * 100, 2) for r in results]
+        if "roi_percent" in wanted:
+            payload["roi_percent"] = roi_percent
+    if wanted & {"irr_percent", "irr_series"}:
+        irr_percent = [finite(r['irr'] * 100, 2) if r['irr'] >= 0 else None for r in results]
+        if "irr_percent" in wanted:
+            payload["irr_percent"] = irr_percent
+    if "breakeven_receipts" in wanted:
+        payload["breakeven_receipts"] = finite(model.breakeven_receipts)
+    if "scenario_summary" in wanted:
+        payload["scenario_summary"] = {
+            key: {
+                "gross_receipts": finite(r.get("gross_receipts", 0)),
+                "total_return": finite(r.get("total_return", 0)),
+                "roi": finite(r.get("roi", 0), 4),
+                "irr": finite(r.get("irr", 0), 4) if r.get("irr", -1.0) != -1.0 else None
+            }
+            for key, r in zip(scenario_keys, results)
+        }
+    if "breakeven_targets" in wanted and model.breakeven_targets:
+        # Solved with the rest of the analysis on the model executor (see FilmFinanceModel.hurdles)
+        breakeven_targets = {
+            kind: [{"target": t, "gross_receipts": finite(g)} for t, g in values.items()]
+            for kind, values in model.breakeven_targets.items()
+        }
+        if breakeven_targets:
+            payload["breakeven_targets"] = breakeven_targets
 
-        roi_series = [
+    if "roi_series" in wanted:
+        payload["roi_series"] = [
             {"scenario": k, "label": n, "roi": r}
             for k, n, r in zip(scenario_keys, scenario_names, roi_percent)
         ]
-        irr_series = [
+    if "irr_series" in wanted:
+        payload["irr_series"] = [
             {"scenario": k, "label": n, "irr": i}
             for k, n, i in zip(scenario_keys, scenario_names, irr_percent)
         ]
-
-        cash_flow_df = model.base_case_cash_flow_df
-        years = cash_flow_df.index.tolist()
-        annual = cash_flow_df['Net Cash Flow to Equity'].round().astype(int).tolist()
-        cumulative = cash_flow_df['Cumulative Cash Flow'].round().astype(int).tolist()
-
-        # Scenario summary KPIs
-        scenario_summary = {
-            scenario_key.lower().replace(" ", "_"): {
-                "gross_receipts": round(scenario_data.get("gross_receipts", 0)),
-                "total_return": round(scenario_data.get("total_return", 0)),
-                "roi": round(scenario_data.get("roi", 0), 4),
-                "irr": round(scenario_data.get("irr", 0), 4) if scenario_data.get("irr", -1.0) != -1.0 else None
+    if "cash_flows" in wanted:
+        base_cash_flow = np.asarray(model.results['Base Case']['cash_flow'])
+        payload["cash_flows"] = {
+            "years": [f'Year {i}' for i in range(len(base_cash_flow))],
+            "annual": [finite(v) for v in base_cash_flow],
+            "cumulative": [finite(v) for v in np.cumsum(base_cash_flow)]
+        }
+    if "investor_composition" in wanted:
+        equity_principal = model.inputs['financing']['Equity_Investment']
+        payload["investor_composition"] = {
+            key: {
+                "principal": finite(min(equity_principal, r.get('total_return', 0))),
+                "profit": finite(max(0, r.get('total_return', 0) - equity_principal))
             }
-            for scenario_key, scenario_data in model.results.items()
+            for key, r in zip(scenario_keys, results)
         }
-
-        return {
-            "scenarios": scenario_keys,
-            "scenario_labels": dict(zip(scenario_keys, scenario_names)),
-            "roi_percent": roi_percent,
-            "irr_percent": irr_percent,
-            "roi_series": roi_series,
-            "irr_series": irr_series,
-            "breakeven_receipts": round(model.breakeven_receipts),
-            "cash_flows": {
-                "years": years,
-                "annual": annual,
-                "cumulative": cumulative
-            },
-            "investor_composition": investor_composition,
-            "scenario_summary": scenario_summary,
-            "annual_waterfalls": annual_waterfalls,
+    if wanted & {"annual_waterfalls", "annual_waterfall_matrix"}:
+        annual = {
+            key: np.nan_to_num(np.round(r["annual_waterfall"], 0))
+            for key, r in zip(scenario_keys, results) if r.get("annual_waterfall") is not None
         }
+        if "annual_waterfalls" in wanted:
+            payload["annual_waterfalls"] = {
+                key: {f"Year {i+1}": dict(zip(LINE_ITEMS, values[:, i].tolist())) for i in range(values.shape[1])}
+                for key, values in annual.items()
+            }
+        if "annual_waterfall_matrix" in wanted:
+            # Rows follow line_items, columns follow years; the arrays are written as-is by the serializer
+            n_years = max((values.shape[1] for values in annual.values()), default=0)
+            payload["annual_waterfall_matrix"] = {
+                "line_items": list(LINE_ITEMS),
+                "years": [f"Year {i+1}" for i in range(n_years)],
+                "scenarios": annual,
+            }
+    return payload
 
+@app.post("/models")
+async def generate_chart_data(req: ReportRequest, fields: Optional[str] = Query(None), accept: Optional[str] = Header(None),
+                              auth=Depends(verify_api_key)):
+    """`fields` is a comma-separated subset of the response sections, e.g. fields=roi_percent,irr_percent."""
+    selected = parse_fields(fields)
+    try:
+        model = build_model(req, selected)
+        with stage("cache"):
+            hit, key = model.load_cached(result_cache)
+        if not hit:
+            model.apply_results(await model_executor.run(analyse_inputs, model.inputs, model.hurdles), result_cache, key)
+        with stage("shaping"):
+            payload = chart_payload(model, req, fields=selected)
+
+    except ExecutorBusy:
+        raise
     except Exception as e:
         logger.exception("Failed to generate chart data")
         raise HTTPException(status_code=500, detail=f"Failed to generate chart data: {str(e)}")
+
+    with stage("render"):
+        return negotiated_response(payload, accept)
+
+@app.post("/models/batch")
+async def generate_batch_chart_data(req: BatchReportRequest, accept: Optional[str] = Header(None),
+                                    auth=Depends(verify_api_key)):
+    if len(req.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large: at most {MAX_BATCH_ITEMS} items per request")
+    selected = parse_fields(req.fields)
+
+    # Validate each item on its own so one bad payload doesn't 422 the whole batch
+    results = [None] * len(req.items)
+    pending = []
+    for i, item in enumerate(req.items):
+        try:
+            item_req = ReportRequest(**item)
+            model = build_model(item_req, selected if selected is not None else KPI_FIELDS if req.kpis_only else None)
+            hit, key = model.load_cached(result_cache)
+            if hit:
+                results[i] = (item_req, model)
+            else:
+                pending.append((i, item_req, model, key))
+        except ValidationError as e:
+            results[i] = {"index": i, "ok": False, "error": e.errors(include_url=False)}
+        except Exception as e:
+            results[i] = {"index": i, "ok": False, "error": str(e)}
+
+    # Cache misses are split across the workers; each chunk is one stacked engine run
+    chunk_size = max(BATCH_CHUNK_MIN, -(-len(pending) // model_executor.workers))
+    chunks = [pending[j:j + chunk_size] for j in range(0, len(pending), chunk_size)]
+    outcomes = await asyncio.gather(*(
+        model_executor.run(analyse_batch, [model.inputs for _, _, model, _ in chunk],
+                           [model.hurdles for _, _, model, _ in chunk]) for chunk in chunks
+    ))
+    for chunk, chunk_outcomes in zip(chunks, outcomes):
+        for (i, item_req, model, key), outcome in zip(chunk, chunk_outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning("Batch item %d failed: %s", i, outcome)
+                results[i] = {"index": i, "ok": False, "error": str(outcome)}
+            else:
+                model.apply_results(outcome, result_cache, key)
+                results[i] = (item_req, model)
+
+    for i, result in enumerate(results):
+        if isinstance(result, tuple):
+            item_req, model = result
+            try:
+                results[i] = {"index": i, "ok": True, "title": item_req.title,
+                              "data": chart_payload(model, item_req, kpis_only=req.kpis_only, fields=selected)}
+            except Exception as e:
+                logger.exception("Failed to shape batch item %d", i)
+                results[i] = {"index": i, "ok": False, "error": str(e)}
+
+    with stage("render"):
+        return negotiated_response({"results": results}, accept)
+
+@app.post("/models/sensitivity")
+async def generate_sensitivity(req: SensitivityRequest, auth=Depends(verify_api_key)):
+    try:
+        model = build_model(req)
+        return await model_executor.run(
+            run_sensitivity, model.inputs, bump=req.bump_percent / 100, parameters=req.parameters,
+            scenario=req.scenario.replace("_", " ").title()
+        )
+
+    except ExecutorBusy:
+        raise
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid sensitivity request: {str(e)}")
+    except Exception as e:
+        logger.exception("Failed to run sensitivity analysis")
+        raise HTTPException(status_code=500, detail=f"Failed to run sensitivity analysis: {str(e)}")
+
+def grid_matrix(values):
+    return np.where(np.isfinite(values), np.round(values, 6), None).tolist()
+
+def grid_binary_response(grid, metrics):
+    # Little-endian float32: x values, y values, then each metric's (len(y), len(x)) matrix row by row
+    arrays = [grid["x"]["values"], grid["y"]["values"]] + [grid[m] for m in metrics]
+    body = b"".join(np.ascontiguousarray(a, dtype="<f4").tobytes() for a in arrays)
+    return Response(content=body, media_type="application/octet-stream", headers={
+        "X-Grid-Shape": ",".join(map(str, grid["shape"])),
+        "X-Grid-Metrics": ",".join(metrics),
+        "X-Grid-X-Parameter": grid["x"]["parameter"],
+        "X-Grid-Y-Parameter": grid["y"]["parameter"],
+    })
+
+@app.post("/models/grid")
+async def generate_grid(req: GridRequest, auth=Depends(verify_api_key)):
+    if req.format not in ("json", "binary"):
+        raise HTTPException(status_code=400, detail="Invalid grid request: format must be 'json' or 'binary'")
+    try:
+        model = build_model(req)
+        x_values = axis_values(req.x.values, req.x.start, req.x.stop, req.x.steps)
+        y_values = axis_values(req.y.values, req.y.start, req.y.stop, req.y.steps)
+        grid = await model_executor.run(
+            run_grid, model.inputs, req.x.parameter, x_values, req.y.parameter, y_values,
+            metrics=tuple(req.metrics), scenario=req.scenario.replace("_", " ").title()
+        )
+
+    except ExecutorBusy:
+        raise
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid grid request: {str(e)}")
+    except Exception as e:
+        logger.exception("Failed to run grid sweep")
+        raise HTTPException(status_code=500, detail=f"Failed to run grid sweep: {str(e)}")
+
+    if req.format == "binary":
+        return grid_binary_response(grid, req.metrics)
+    return {
+        "title": req.title,
+        "scenario": grid["scenario"],
+        "x": {"parameter": req.x.parameter, "values": grid["x"]["values"].tolist()},
+        "y": {"parameter": req.y.parameter, "values": grid["y"]["values"].tolist()},
+        "shape": list(grid["shape"]),
+        **{metric: grid_matrix(grid[metric]) for metric in req.metrics},
+    }
+
+@app.post("/models/slate")
+async def generate_slate(req: SlateRequest, auth=Depends(verify_api_key)):
+    if len(req.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Slate too large: at most {MAX_BATCH_ITEMS} films per request")
+    try:
+        films = [build_model(item).inputs for item in req.items]
+        scenario = req.scenario.replace("_", " ").title()
+        runs = [model_executor.run(run_slate, films, req.start_years, scenario)]
+        if req.monte_carlo is not None:
+            shocks = req.monte_carlo
+            runs.append(model_executor.run(
+                run_slate_monte_carlo, films, req.start_years, n_draws=shocks.n_draws, sigma=shocks.sigma,
+                correlation=shocks.correlation, seed=shocks.seed, scenario=scenario
+            ))
+        slate, *monte_carlo = await asyncio.gather(*runs)
+
+    except ExecutorBusy:
+        raise
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid slate request: {str(e)}")
+    except Exception as e:
+        logger.exception("Failed to run slate analysis")
+        raise HTTPException(status_code=500, detail=f"Failed to run slate analysis: {str(e)}")
+
+    for result in [slate, *monte_carlo]:
+        for item, film in zip(req.items, result["films"]):
+            film["title"] = item.title
+    return {**slate, "monte_carlo": monte_carlo[0] if monte_carlo else None}
+
+@app.get("/ready")
+def readiness():
+    search = search_readiness()
+    return {"finance": True, "search": search["ready"], "search_status": search}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text exposition format; unauthenticated like /ready so scrapers can reach it
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+def cache_stats(auth=Depends(verify_api_key)):
+    return result_cache.stats()
+
+@app.get("/executor/stats")
+def executor_stats(auth=Depends(verify_api_key)):
+    return model_executor.stats()
+
+@app.get("/models/report/jobs/stats")  # registered before /models/report/jobs/{job_id}
+def report_job_stats(auth=Depends(verify_api_key)):
+    return report_jobs.stats()
+
+@app.post("/models/monte-carlo")
+async def generate_monte_carlo(req: MonteCarloRequest, auth=Depends(verify_api_key)):
+    try:
+        model = build_model(req)
+        return await model_executor.run(
+            run_monte_carlo, model.inputs, req.revenue_distributions, req.schedule_distribution,
+            n_draws=req.n_draws, seed=req.seed
+        )
+
+    except ExecutorBusy:
+        raise
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid Monte Carlo request: {str(e)}")
+    except Exception as e:
+        logger.exception("Failed to run Monte Carlo simulation")
+        raise HTTPException(status_code=500, detail=f"Failed to run Monte Carlo simulation: {str(e)}")
+
+@app.post("/models/forecast")
+async def generate_forecast(req: ForecastRequest, auth=Depends(verify_api_key)):
+    indices = await search.search_indices(req.logline, req.top_k, req)
+    revenues = search.metadata["revenue"][indices]
+    inputs = {
+        "budget": req.budget,
+        "financing": req.financing,
+        "base_case_revenue": req.base_case_revenue,
+        "waterfall_terms": req.waterfall_terms,
+        "timeline": req.timeline,
+    }
+    try:
+        forecast = await model_executor.run(run_comparable_forecast, inputs, revenues, req.revenue_scale)
+
+    except ExecutorBusy:
+        raise
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid forecast request: {str(e)}")
+    except Exception as e:
+        logger.exception("Failed to run comparable forecast")
+        raise HTTPException(status_code=500, detail=f"Failed to run comparable forecast: {str(e)}")
+
+    used = indices[np.asarray(forecast.pop("used"))]
+    roi, irr = forecast.pop("comparable_roi"), forecast.pop("comparable_irr")
+    titles, directors = search.metadata["title"][used].tolist(), search.metadata["director"][used].tolist()
+    comparables = [
+        {"title": search._json_value(t), "director": search._json_value(d), "revenue": float(r), "roi": round(o, 4),
+         "irr": round(i, 4) if i != -1.0 else None}
+        for t, d, r, o, i in zip(titles, directors, search.metadata["revenue"][used].tolist(), roi, irr)
+    ]
+    return {"title": req.title, "logline": req.logline, **forecast, "comparables": comparables}
+
+def report_filename(title):
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in title.replace(" ", "_"))
+    return f"{safe or 'Film'}_Advanced_Finance_Report.pdf"
+
+def pdf_response(pdf_bytes, filename):
+    return Response(content=pdf_bytes, media_type="application/pdf",
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.post("/models/report")
+async def generate_report(req: ReportRequest, auth=Depends(verify_api_key)):
+    try:
+        model = build_model(req)
+        hit, key = model.load_cached(result_cache)
+        if not hit:
+            model.apply_results(await model_executor.run(analyse_inputs, model.inputs, model.hurdles), result_cache, key)
+        # Charts render on separate workers, then the PDF is assembled from their PNG bytes
+        charts = await asyncio.gather(*(model_executor.run(render_chart, kind, data) for kind, data in chart_inputs(model)))
+        pdf_bytes = await model_executor.run(build_report_pdf, [(req.title, model.inputs, model.raw_results, charts)])
+        return pdf_response(pdf_bytes, report_filename(req.title))
+
+    except ExecutorBusy:
+        raise
+    except Exception as e:
+        logger.exception("Failed to generate PDF report")
+        raise HTTPException(status_code=500, detail=f"Failed to generate PDF report: {str(e)}")
+
+async def run_when_free(fn, *args):
+    """model_executor.run for background work: waits out backpressure instead of failing."""
+    while True:
+        try:
+            return await model_executor.run(fn, *args)
+        except ExecutorBusy as e:
+            await asyncio.sleep(e.retry_after)
+
+async def run_report_job(job, req: SlateReportRequest):
+    job.status = "running"
+    slots = asyncio.Semaphore(model_executor.workers)
+
+    async def film(item):
+        async with slots:
+            inputs = build_model(item).inputs
+            raw_results, charts = await run_when_free(analyse_and_render, item.title, inputs)
+        job.completed += 1
+        return item.title, inputs, raw_results, charts
+
+    try:
+        films = await asyncio.gather(*(film(item) for item in req.items))
+        job.finish(await run_when_free(build_report_pdf, films), report_filename(req.title))
+    except Exception as e:
+        logger.exception("Report job %s failed", job.id)
+        job.fail(str(e))
+
+@app.post("/models/report/jobs", status_code=202)
+async def create_report_job(req: SlateReportRequest, auth=Depends(verify_api_key)):
+    if not req.items:
+        raise HTTPException(status_code=400, detail="A report job needs at least one item")
+    if len(req.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Slate too large: at most {MAX_BATCH_ITEMS} items per report")
+    job = report_jobs.create(len(req.items))
+    if job is None:
+        raise HTTPException(status_code=503, detail="Too many report jobs in progress, retry later",
+                            headers={"Retry-After": str(model_executor.retry_after)})
+    job.task = asyncio.create_task(run_report_job(job, req))
+    return {**job.summary(), "status_url": f"/models/report/jobs/{job.id}",
+            "pdf_url": f"/models/report/jobs/{job.id}/pdf"}
+
+def get_report_job(job_id):
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired report job '{job_id}'")
+    return job
+
+@app.get("/models/report/jobs/{job_id}")
+def report_job_status(job_id: str, auth=Depends(verify_api_key)):
+    return get_report_job(job_id).summary()
+
+@app.get("/models/report/jobs/{job_id}/pdf")
+def report_job_pdf(job_id: str, auth=Depends(verify_api_key)):
+    job = get_report_job(job_id)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status}", headers={"Retry-After": "1"})
+    return pdf_response(job.result, job.filename)
@@ -0,0 +1,53 @@
+# ==============================================================
+#  Comparable-Driven Forecast
+#
+# Turns the revenues of similar films (from /search) into an empirical
+# gross receipts distribution for a new deal. Each comparable's revenue
+# is split across revenue streams in the deal's base case proportions
+# and the whole set goes through the vectorized waterfall in one pass,
+# giving ROI / IRR quantiles instead of three fixed scenarios.
+# ==============================================================
+
+import numpy as np
+
+from breakeven import revenue_proportions
+from monte_carlo import DEFAULT_PERCENTILES, distribution_summary
+from waterfall_engine import evaluate_waterfall, cash_flow_irr
+
+
+def run_comparable_forecast(inputs, comparable_revenues, revenue_scale=1.0, percentiles=DEFAULT_PERCENTILES):
+    """
+    Evaluates the deal once per comparable film.
+
+    `comparable_revenues` are the comps' total revenues (NaN/non-positive
+    values are ignored); `revenue_scale` converts them into the deal's
+    gross receipts (e.g. box office -> distributor receipts).
+    Returns per-comparable ROI/IRR plus their distribution summaries.
+    """
+    revenues = np.asarray(comparable_revenues, dtype=float)
+    usable = np.isfinite(revenues) & (revenues > 0)
+    if not usable.any():
+        raise ValueError("No comparables with a known revenue")
+    gross = revenues[usable] * revenue_scale
+
+    proportions = revenue_proportions(inputs['base_case_revenue'])
+    domestic, foreign = gross * proportions['Domestic'], gross * proportions['Foreign']
+    tl = inputs['timeline']
+    res = evaluate_waterfall(domestic, foreign, inputs['financing'], inputs['waterfall_terms'],
+                             tl['revenue_recognition_schedule'], tl['projection_years'],
+                             other_revenue=gross - domestic - foreign, compute_irr=False, line_items=False)
+    roi = res['roi']
+    irr = cash_flow_irr(res['cash_flow'], res['total_return'])
+    profit = res['total_return'] - inputs['financing']['Equity_Investment']
+
+    return {
+        'n_comparables': int(usable.sum()),
+        'used': usable.tolist(),
+        'gross_receipts': distribution_summary(gross, percentiles),
+        'roi': distribution_summary(roi, percentiles),
+        'irr': distribution_summary(irr, percentiles),
+        'probability_of_loss': float((roi < 0).mean()),
+        'expected_profit': float(profit.mean()),
+        'comparable_roi': roi.tolist(),
+        'comparable_irr': irr.tolist(),
+    }
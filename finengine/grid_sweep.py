@@ -0,0 +1,88 @@
+# ==============================================================
+#  Two-Parameter Grid Sweep
+#
+# Sweeps two inputs (e.g. base_case_revenue.Domestic x
+# base_case_revenue.Foreign, or waterfall_terms.Equity_Premium_Percent x
+# waterfall_terms.Net_Profit_Split_To_Investors) over a grid for
+# heatmaps. The y values become a column vector and the x values a row
+# vector, so a single broadcast engine call evaluates every cell; IRR
+# and breakeven are only computed when asked for.
+# ==============================================================
+
+import numpy as np
+
+from breakeven import solve_breakeven
+from sensitivity import scenario_multiplier
+from waterfall_engine import evaluate_waterfall, _arr
+
+MAX_GRID_CELLS = 250_000
+GRID_SECTIONS = ('base_case_revenue', 'financing', 'waterfall_terms')
+GRID_METRICS = ('roi', 'irr', 'total_return', 'breakeven_receipts')
+DEFAULT_METRICS = ('roi', 'irr')
+
+
+def axis_values(values=None, start=None, stop=None, steps=None):
+    """Grid axis from explicit values or an inclusive linspace(start, stop, steps)."""
+    # Checked before anything is allocated; run_grid then limits the whole grid
+    if len(values if values is not None else ()) > MAX_GRID_CELLS or (steps is not None and steps > MAX_GRID_CELLS):
+        raise ValueError(f"a grid axis must have at most {MAX_GRID_CELLS:,} values")
+    if values is not None:
+        axis = np.asarray(values, dtype=float)
+    elif None not in (start, stop, steps):
+        axis = np.linspace(start, stop, int(steps))
+    else:
+        raise ValueError("a grid axis needs either values or start, stop and steps")
+    if axis.ndim != 1 or axis.size == 0:
+        raise ValueError("a grid axis needs at least one value")
+    return axis
+
+
+def run_grid(inputs, x_parameter, x_values, y_parameter, y_values, metrics=DEFAULT_METRICS, scenario='Base Case'):
+    """
+    Evaluates the deal on every (y, x) cell; parameters are 'section.key' names
+    and swept revenue values are base case amounts (scaled by the scenario).
+    Returns the axes plus one (len(y), len(x)) array per requested metric.
+    """
+    if len(x_values) * len(y_values) > MAX_GRID_CELLS:
+        raise ValueError(f"grid must have at most {MAX_GRID_CELLS:,} cells")
+    multiplier = scenario_multiplier(inputs, scenario)
+    unknown = set(metrics) - set(GRID_METRICS)
+    if unknown:
+        raise ValueError(f"Unknown grid metrics: {', '.join(sorted(unknown))}")
+    if x_parameter == y_parameter:
+        raise ValueError("x and y must sweep different parameters")
+
+    sections = {section: dict(inputs[section]) for section in GRID_SECTIONS}
+    for parameter, values, orientation in ((y_parameter, y_values, (-1, 1)), (x_parameter, x_values, (1, -1))):
+        section, _, key = parameter.partition('.')
+        if section not in GRID_SECTIONS or key not in sections[section]:
+            raise ValueError(f"Unknown grid parameter '{parameter}'")
+        sections[section][key] = np.asarray(values, dtype=float).reshape(orientation)
+
+    revenue = sections['base_case_revenue']
+    domestic, foreign = _arr(revenue['Domestic']), _arr(revenue['Foreign'])
+    other = sum((_arr(v) for k, v in revenue.items() if k not in ('Domestic', 'Foreign')), _arr(0.0))
+    tl = inputs['timeline']
+    res = evaluate_waterfall(domestic * multiplier, foreign * multiplier, sections['financing'],
+                             sections['waterfall_terms'], tl['revenue_recognition_schedule'], tl['projection_years'],
+                             other_revenue=other * multiplier, compute_irr='irr' in metrics, line_items=False)
+
+    shape = (len(y_values), len(x_values))
+    result = {
+        'scenario': scenario,
+        'x': {'parameter': x_parameter, 'values': np.asarray(x_values, dtype=float)},
+        'y': {'parameter': y_parameter, 'values': np.asarray(y_values, dtype=float)},
+        'shape': shape,
+    }
+    for metric in ('roi', 'irr', 'total_return'):
+        if metric in metrics:
+            result[metric] = np.broadcast_to(res[metric], shape)
+    if 'breakeven_receipts' in metrics:
+        # The revenue mix is undefined where nothing is earned; those cells get NaN
+        total = domestic + foreign + other
+        with np.errstate(divide='ignore', invalid='ignore'):
+            proportions = {'Domestic': domestic / total, 'Foreign': foreign / total}
+        breakeven = solve_breakeven(proportions, sections['financing'], sections['waterfall_terms'],
+                                    tl['revenue_recognition_schedule'], tl['projection_years'])
+        result['breakeven_receipts'] = np.broadcast_to(np.where(total > 0, breakeven, np.nan), shape)
+    return result
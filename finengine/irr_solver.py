@@ -0,0 +1,145 @@
+# ==============================================================
+#  Vectorized IRR Solver
+#
+# IRR for a 2-D array of cash flows (rows x periods) in one pass,
+# replacing one numpy_financial.irr (companion-matrix eigen solve)
+# per scenario. Works on the discount factor t = 1/(1+r), where NPV is
+# the polynomial sum(c_k * t^k):
+#
+# - Descartes' rule of signs: with exactly one sign change in the cash
+#   flows there is exactly one root t > 0. These rows (every ordinary
+#   investor flow: outlay, then receipts) are solved together with a
+#   bracketed Newton iteration that falls back to bisection whenever
+#   a Newton step would leave the bracket.
+# - No sign change: no rate exists, the result is NaN.
+# - Two or more sign changes: there may be several rates (or none).
+#   Those rows are grouped by their leading/trailing zero pattern and
+#   solved together as batched companion-matrix eigenvalues
+#   (np.linalg.eigvals, the same eigenproblem np.roots solves per row);
+#   like npf.irr, the real rate closest to zero is returned.
+#
+# Results agree with npf.irr to ~1e-10 on the rate.
+# ==============================================================
+
+import numpy as np
+
+DEFAULT_TOLERANCE = 1e-13
+DEFAULT_MAX_ITERATIONS = 100
+
+
+def _carried_signs(cash_flows):
+    """Sign of each period, zeros replaced by the last non-zero sign before them."""
+    signs = np.sign(cash_flows)
+    periods = np.arange(signs.shape[1])
+    last_nonzero = np.maximum.accumulate(np.where(signs != 0, periods, 0), axis=1)
+    return np.take_along_axis(signs, last_nonzero, axis=1)
+
+
+def _npv_and_slope(cash_flows, t):
+    """NPV polynomial and its derivative in t for every row (Horner's rule)."""
+    npv = cash_flows[:, -1].copy()
+    slope = np.zeros_like(npv)
+    for k in range(cash_flows.shape[1] - 2, -1, -1):
+        slope = slope * t + npv
+        npv = npv * t + cash_flows[:, k]
+    return npv, slope
+
+
+def _single_root(cash_flows, high_sign, tol, max_iterations):
+    """Discount factor of the unique positive root; `high_sign` is the NPV sign for large t."""
+    rows, periods = cash_flows.shape
+    # Cauchy's bound: every root satisfies |t| <= 1 + max|c_k| / |c_lead|
+    lead = np.abs(cash_flows[np.arange(rows), periods - 1 - (cash_flows[:, ::-1] != 0).argmax(axis=1)])
+    low = np.zeros(rows)
+    high = 1 + np.abs(cash_flows).max(axis=1) / lead
+
+    # Start from the rate that would hold if the outlays and the receipts each
+    # happened at their amount-weighted mean period (exact for one outlay and
+    # one receipt), which leaves Newton a few steps from the root.
+    amounts = np.abs(cash_flows)
+    late = np.where(np.sign(cash_flows) == high_sign[:, None], amounts, 0.0)
+    early = amounts - late
+    late_total, early_total = late.sum(axis=1), early.sum(axis=1)
+    period = np.arange(periods, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        span = (late @ period) / late_total - (early @ period) / early_total
+        t = (early_total / late_total) ** (1 / span)
+    t = np.where(np.isfinite(t) & (t > 0) & (t < high), t, 0.5 * high)
+
+    # Bracketed Newton on a working set that is compacted as rows converge
+    rows_left, solved = np.arange(rows), t.copy()
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(max_iterations):
+            npv, slope = _npv_and_slope(cash_flows, t)
+            above = np.sign(npv) == high_sign
+            high = np.where(above, t, high)
+            low = np.where(above, low, t)
+            step = npv / slope
+            newton = t - step
+            # a step below the tolerance may round onto the bracket edge; that's convergence
+            inside = np.isfinite(newton) & (((newton > low) & (newton < high)) | (np.abs(step) <= tol * t))
+            next_t = np.where(npv == 0, t, np.where(inside, newton, 0.5 * (low + high)))
+            moving = np.abs(next_t - t) > tol * next_t
+            t = next_t
+            if not moving.any():
+                break
+            if moving.sum() < moving.size // 2:
+                solved[rows_left] = t
+                rows_left, cash_flows, t, low, high, high_sign = (
+                    a[moving] for a in (rows_left, cash_flows, t, low, high, high_sign))
+    solved[rows_left] = t
+    return solved
+
+
+def _closest_roots(cash_flows):
+    """
+    npf.irr's rule for flows that may have several rates: the real rate
+    closest to zero. Same companion-matrix eigenvalues as np.roots, but
+    batched over all rows with the same leading/trailing zero pattern.
+    """
+    rates = np.full(cash_flows.shape[0], np.nan)
+    nonzero = cash_flows != 0
+    first = nonzero.argmax(axis=1)
+    last = cash_flows.shape[1] - 1 - nonzero[:, ::-1].argmax(axis=1)
+    for f, l in set(zip(first.tolist(), last.tolist())):
+        rows = np.flatnonzero((first == f) & (last == l))
+        coeffs = cash_flows[rows, f:l + 1]  # t^f factors out: those roots are t = 0, not a rate
+        degree = l - f
+        companion = np.zeros((rows.size, degree, degree))
+        companion[:, 0, :] = -coeffs[:, -2::-1] / coeffs[:, -1:]
+        companion[:, 1:, :-1] += np.eye(degree - 1)
+        roots = np.linalg.eigvals(companion)
+        real = (roots.imag == 0) & (roots.real > 0)
+        with np.errstate(divide='ignore'):
+            candidates = np.where(real, 1 / np.where(real, roots.real, 1.0) - 1, np.nan)
+        distance = np.where(real, np.abs(candidates), np.inf)
+        best = np.take_along_axis(candidates, distance.argmin(axis=1)[:, None], axis=1)[:, 0]
+        rates[rows] = np.where(real.any(axis=1), best, np.nan)
+    return rates
+
+
+def solve_irr(cash_flows, tol=DEFAULT_TOLERANCE, max_iterations=DEFAULT_MAX_ITERATIONS):
+    """
+    IRR of every cash-flow row; the last axis is the period.
+
+    Returns NaN where no rate exists (all flows the same sign, or no
+    real root), matching npf.irr.
+    """
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    flat = cash_flows.reshape(-1, cash_flows.shape[-1])
+    rates = np.full(flat.shape[0], np.nan)
+    if flat.shape[1] < 2 or not flat.shape[0]:
+        return rates.reshape(cash_flows.shape[:-1])
+
+    signs = _carried_signs(flat)
+    changes = (signs[:, 1:] * signs[:, :-1] < 0).sum(axis=1)
+
+    single = np.flatnonzero(changes == 1)
+    if single.size:
+        t = _single_root(flat[single], signs[single, -1], tol, max_iterations)
+        with np.errstate(divide='ignore'):
+            rates[single] = 1 / t - 1
+    several = np.flatnonzero(changes > 1)
+    if several.size:
+        rates[several] = _closest_roots(flat[several])
+    return rates.reshape(cash_flows.shape[:-1])
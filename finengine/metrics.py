@@ -0,0 +1,203 @@
+# ==============================================================
+#  Request Metrics and Sampling Profiler
+#
+# The web side of the stage timers in timers.py: TimedRoute records
+# request parsing/validation and response serialization as stages,
+# MetricsMiddleware keeps the request latency histogram and can return
+# a request's stages as a Server-Timing header, and GET /metrics renders
+# every histogram in the Prometheus text exposition format.
+#
+# Histograms live in the process that recorded them; with several
+# uvicorn workers each one exposes its own /metrics.
+#
+# Configuration (environment):
+#   TIMING_HEADERS        1 adds a Server-Timing header to every response
+#   PROFILE_SAMPLE_RATE   fraction of requests to profile (0 = off, 0.01 = 1%)
+#   PROFILE_DIR           where profiles are written (pyinstrument HTML
+#                         if installed, else cProfile .prof)
+#   PROFILE_MAX_FILES     oldest profiles are deleted past this many
+# ==============================================================
+
+import functools
+import glob
+import inspect
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+
+from timers import STAGE_SECONDS, Histogram, Trace, request_trace, record
+
+logger = logging.getLogger(__name__)
+
+REQUEST_SECONDS = Histogram("finengine_request_duration_seconds", "HTTP request latency in seconds",
+                            ("method", "route", "status"))
+
+
+def render_metrics():
+    return "\n".join(h.render() for h in (REQUEST_SECONDS, STAGE_SECONDS)) + "\n"
+
+
+# -------------------------------------------------------------- routes
+
+def _mark_endpoint(endpoint):
+    """Wraps an endpoint so the route can tell validation and serialization apart from it."""
+    def mark(start):
+        trace = request_trace.get()
+        if trace is not None:
+            trace.endpoint_span = (start, time.perf_counter())
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def marked(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                mark(start)
+    else:
+        @functools.wraps(endpoint)
+        def marked(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                mark(start)
+    return marked
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that records request parsing/validation (body, dependencies,
+    pydantic) and response serialization as stages around the endpoint.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _mark_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        path = self.path
+
+        async def timed_handler(request):
+            trace = request_trace.get()
+            if trace is None:
+                return await handler(request)
+            trace.route = path
+            start = time.perf_counter()
+            try:
+                response = await handler(request)
+            except RequestValidationError:
+                record("validation", time.perf_counter() - start)
+                raise
+            if trace.endpoint_span is not None:
+                began, ended = trace.endpoint_span
+                record("validation", began - start)
+                record("serialization", time.perf_counter() - ended)
+            return response
+
+        return timed_handler
+
+
+# -------------------------------------------------------------- profiler
+
+class RequestProfiler:
+    """Profiles a random sample of requests, one at a time."""
+
+    def __init__(self, rate=0.0, directory="profiles", max_files=100):
+        self.rate = rate
+        self.directory = directory
+        self.max_files = max_files
+        self._busy = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+                   directory=os.getenv("PROFILE_DIR", "profiles"),
+                   max_files=int(os.getenv("PROFILE_MAX_FILES", "100")))
+
+    def start(self):
+        """Returns a running profiler for a sampled request, else None."""
+        if self.rate <= 0 or random.random() >= self.rate or not self._busy.acquire(blocking=False):
+            return None
+        try:
+            try:
+                from pyinstrument import Profiler
+                profiler = Profiler(async_mode="enabled")
+            except ImportError:
+                import cProfile
+                profiler = cProfile.Profile()
+                profiler.enable()
+            else:
+                profiler.start()
+            return profiler
+        except Exception:
+            self._busy.release()
+            logger.exception("Failed to start request profiler")
+            return None
+
+    def finish(self, profiler, method, route, seconds):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            name = "_".join(filter(None, re.split(r"\W+", f"{method} {route}")))
+            stem = os.path.join(self.directory, f"{time.strftime('%Y%m%dT%H%M%S')}_{name}_{seconds * 1000:.0f}ms")
+            if hasattr(profiler, "output_html"):
+                profiler.stop()
+                with open(stem + ".html", "w") as fh:
+                    fh.write(profiler.output_html())
+            else:
+                profiler.disable()
+                profiler.dump_stats(stem + ".prof")
+            profiles = sorted(glob.glob(os.path.join(self.directory, "*.html"))
+                              + glob.glob(os.path.join(self.directory, "*.prof")), key=os.path.getmtime)
+            for old in profiles[:max(0, len(profiles) - self.max_files)]:
+                os.remove(old)
+        except Exception:
+            logger.exception("Failed to write request profile")
+        finally:
+            self._busy.release()
+
+
+# -------------------------------------------------------------- middleware
+
+class MetricsMiddleware:
+    """ASGI middleware: request histogram, per-request trace, Server-Timing header and profiling."""
+
+    def __init__(self, app, timing_headers=False, profiler=None):
+        self.app = app
+        self.timing_headers = timing_headers
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trace = Trace(route="unmatched")
+        token = request_trace.set(trace)
+        profiler = self.profiler.start() if self.profiler is not None else None
+        start = time.perf_counter()
+        status = 500
+
+        async def send_timed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.timing_headers:
+                    timing = trace.server_timing(time.perf_counter() - start)
+                    message = {**message, "headers": [*message.get("headers", []),
+                                                      (b"server-timing", timing.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            seconds = time.perf_counter() - start
+            request_trace.reset(token)
+            route = getattr(scope.get("route"), "path", trace.route)
+            REQUEST_SECONDS.observe(seconds, scope["method"], route, str(status))
+            if profiler is not None:
+                self.profiler.finish(profiler, scope["method"], route, seconds)
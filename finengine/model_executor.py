@@ -0,0 +1,143 @@
+# ==============================================================
+#  Model Execution Backend
+#
+# Runs CPU-bound model work off the event loop so it doesn't hold
+# Starlette's thread pool (and the GIL) while /search requests wait.
+#
+# Configuration (environment):
+#   MODEL_EXECUTOR      process (default) | thread | inline
+#   MODEL_WORKERS       pool size, defaults to the number of cores
+#   MODEL_MAX_PENDING   max queued + running jobs before we shed load
+#   MODEL_RETRY_AFTER   seconds suggested to clients on a 503
+# ==============================================================
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from timers import record, traced_call
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('process', 'thread', 'inline')
+
+
+class ExecutorBusy(Exception):
+    """Raised when the job queue is full; maps to 503 + Retry-After."""
+
+    def __init__(self, retry_after):
+        super().__init__("Model executor is at capacity, retry later")
+        self.retry_after = retry_after
+
+
+def _warm_worker():
+    # Import the engine and run one tiny deal so the first real request
+    # doesn't pay for module imports and NumPy/BLAS initialisation.
+    import film_finance_model as ffm
+    ffm.analyse_inputs({
+        'budget': ffm.budget, 'financing': ffm.financing, 'base_case_revenue': ffm.base_case_revenue,
+        'scenario_multipliers': ffm.scenario_multipliers, 'waterfall_terms': ffm.waterfall_terms,
+        'timeline': ffm.timeline
+    })
+
+
+def _noop():
+    return os.getpid()
+
+
+class ModelExecutor:
+    def __init__(self, backend='process', workers=None, max_pending=None, retry_after=1):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown executor backend '{backend}', expected one of {BACKENDS}")
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.retry_after = retry_after
+        self.pending = 0
+        self.rejected = 0
+        self._pool = None
+        self._warmups = []
+
+    @classmethod
+    def from_env(cls):
+        workers = os.getenv("MODEL_WORKERS")
+        max_pending = os.getenv("MODEL_MAX_PENDING")
+        return cls(
+            backend=os.getenv("MODEL_EXECUTOR", "process"),
+            workers=int(workers) if workers else None,
+            max_pending=int(max_pending) if max_pending else None,
+            retry_after=int(os.getenv("MODEL_RETRY_AFTER", "1")),
+        )
+
+    def start(self):
+        """Creates the pool and spins up every worker ahead of the first request (without waiting on them)."""
+        if self._pool is not None or self.backend == 'inline':
+            return
+        if self.backend == 'process':
+            # spawn rather than fork: the API process may already hold FAISS/torch threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_warm_worker
+            )
+            self._warmups = [self._pool.submit(_noop) for _ in range(self.workers)]
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='model')
+        logger.info("Model executor started: %s backend, %d workers", self.backend, self.workers)
+
+    @property
+    def warm(self):
+        """True once every process worker has started and run its warm-up."""
+        return all(future.done() for future in self._warmups)
+
+    def shutdown(self):
+        self._warmups = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs fn(*args, **kwargs) on the backend; raises ExecutorBusy past max_pending."""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorBusy(self.retry_after)
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            if self.backend == 'inline':
+                result, stages, run_seconds = traced_call(fn, *args, **kwargs)
+            else:
+                if self._pool is None:
+                    self.start()
+                loop = asyncio.get_running_loop()
+                # Workers take a moment to spawn; serve from a thread until they're warm
+                pool = self._pool if self.warm else None
+                try:
+                    result, stages, run_seconds = await loop.run_in_executor(
+                        pool, functools.partial(traced_call, fn, *args, **kwargs))
+                except BrokenProcessPool:
+                    # A worker died (OOM, segfault); replace the pool so later requests recover
+                    logger.error("Model worker pool broke, restarting it")
+                    self.shutdown()
+                    raise
+        finally:
+            self.pending -= 1
+        # Stages timed on the worker are recorded here; the rest is queueing and IPC
+        for name, seconds in stages.items():
+            record(name, seconds)
+        record('executor_wait', time.perf_counter() - start - run_seconds)
+        return result
+
+    def stats(self):
+        return {
+            "backend": self.backend,
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "warm": self.warm,
+        }
@@ -0,0 +1,144 @@
+# ==============================================================
+#  Monte Carlo Scenario Engine
+#
+# Draws Domestic/Foreign revenue and recognition-schedule timing from
+# user supplied distributions and pushes every draw through the
+# vectorized waterfall in chunks. Returns distribution summaries
+# (percentile ROI/IRR, probability of loss, VaR / expected shortfall)
+# instead of the three fixed Worst/Base/Best cases.
+# ==============================================================
+
+import numpy as np
+
+from waterfall_engine import evaluate_waterfall, cash_flow_irr
+
+DEFAULT_PERCENTILES = (1, 5, 10, 25, 50, 75, 90, 95, 99)
+DEFAULT_VAR_LEVELS = (0.95, 0.99)
+MAX_DRAWS = 1_000_000
+
+
+def sample_distribution(spec, size, rng):
+    """
+    Samples `size` values from a distribution spec such as
+    {'dist': 'lognormal', 'mean': 4.5e6, 'sigma': 0.4}.
+
+    Supported: fixed(value), normal(mean, std), lognormal(mean, sigma),
+    triangular(low, mode, high), uniform(low, high), empirical(values).
+    Revenue can't go negative, so normal draws are clipped at zero.
+    """
+    dist = spec.get('dist', 'fixed')
+    if dist == 'fixed':
+        return np.full(size, float(spec['value']))
+    if dist == 'normal':
+        return np.maximum(rng.normal(spec['mean'], spec['std'], size), 0.0)
+    if dist == 'lognormal':
+        # `mean` is the arithmetic mean of the draws, `sigma` the log-space std
+        sigma = float(spec['sigma'])
+        mu = np.log(spec['mean']) - 0.5 * sigma ** 2
+        return rng.lognormal(mu, sigma, size)
+    if dist == 'triangular':
+        return rng.triangular(spec['low'], spec['mode'], spec['high'], size)
+    if dist == 'uniform':
+        return rng.uniform(spec['low'], spec['high'], size)
+    if dist == 'empirical':
+        values = np.asarray(spec['values'], dtype=float)
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            raise ValueError("empirical distribution needs at least one finite value")
+        return rng.choice(values, size)
+    raise ValueError(f"Unknown distribution '{dist}'")
+
+
+def sample_schedule(base_schedule, spec, size, rng):
+    """
+    Samples recognition schedules around `base_schedule`.
+
+    {'dist': 'dirichlet', 'concentration': k} keeps the base schedule as
+    the mean timing; a larger k means less timing noise. The total
+    recognised share (sum of the base schedule) is preserved.
+    """
+    base = np.asarray(base_schedule, dtype=float)
+    if spec is None or spec.get('dist', 'fixed') == 'fixed':
+        return base
+    if spec['dist'] == 'dirichlet':
+        total = base.sum()
+        if total <= 0 or np.any(base <= 0):
+            raise ValueError("dirichlet timing needs a strictly positive base schedule")
+        alpha = float(spec['concentration']) * base / total
+        return rng.dirichlet(alpha, size) * total
+    raise ValueError(f"Unknown schedule distribution '{spec['dist']}'")
+
+
+def distribution_summary(values, percentiles):
+    """Mean, std and percentiles of the finite values (all None if there are none)."""
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return {'mean': None, 'std': None, 'percentiles': {f"p{p}": None for p in percentiles}}
+    return {
+        'mean': float(values.mean()),
+        'std': float(values.std()),
+        'percentiles': {f"p{p}": float(v) for p, v in zip(percentiles, np.percentile(values, percentiles))},
+    }
+
+
+def run_monte_carlo(inputs, revenue_distributions, schedule_distribution=None, n_draws=100_000,
+                    seed=None, percentiles=DEFAULT_PERCENTILES, var_levels=DEFAULT_VAR_LEVELS,
+                    chunk_size=250_000):
+    """
+    Runs `n_draws` stochastic scenarios for one deal.
+
+    Revenue streams without a distribution stay at their base case value.
+    The same seed always reproduces the same draws regardless of chunk_size.
+    """
+    if not 1 <= n_draws <= MAX_DRAWS:
+        raise ValueError(f"n_draws must be between 1 and {MAX_DRAWS:,}")
+    rng = np.random.default_rng(seed)
+    base_rev, terms, fin, tl = (inputs['base_case_revenue'], inputs['waterfall_terms'],
+                                inputs['financing'], inputs['timeline'])
+
+    unknown = set(revenue_distributions) - set(base_rev)
+    if unknown:
+        raise ValueError(f"No base case revenue for: {', '.join(sorted(unknown))}")
+    draws = {k: (sample_distribution(revenue_distributions[k], n_draws, rng) if k in revenue_distributions
+                 else np.full(n_draws, float(v)))
+             for k, v in base_rev.items()}
+    schedule = sample_schedule(tl['revenue_recognition_schedule'], schedule_distribution, n_draws, rng)
+
+    domestic, foreign = draws['Domestic'], draws['Foreign']
+    other = sum(draws.values()) - domestic - foreign
+
+    roi, irr, total_return = (np.empty(n_draws) for _ in range(3))
+    for start in range(0, n_draws, chunk_size):
+        chunk = slice(start, min(start + chunk_size, n_draws))
+        res = evaluate_waterfall(domestic[chunk], foreign[chunk], fin, terms,
+                                 schedule[chunk] if schedule.ndim == 2 else schedule,
+                                 tl['projection_years'], other_revenue=other[chunk],
+                                 compute_irr=False, line_items=False)
+        roi[chunk] = res['roi']
+        total_return[chunk] = res['total_return']
+        irr[chunk] = cash_flow_irr(res['cash_flow'], res['total_return'])
+
+    equity_principal = fin['Equity_Investment']
+    profit = total_return - equity_principal
+    value_at_risk = {}
+    for level in var_levels:
+        roi_cutoff = np.percentile(roi, 100 * (1 - level))
+        tail = roi <= roi_cutoff
+        value_at_risk[f"{level:.0%}"] = {
+            'roi': float(-roi_cutoff),
+            'amount': float(-np.percentile(profit, 100 * (1 - level))),
+            'expected_shortfall_roi': float(-roi[tail].mean()),
+            'expected_shortfall_amount': float(-profit[tail].mean()),
+        }
+
+    return {
+        'n_draws': n_draws,
+        'seed': seed,
+        'roi': distribution_summary(roi, percentiles),
+        'irr': distribution_summary(irr, percentiles),
+        'gross_receipts': distribution_summary(domestic + foreign + other, percentiles),
+        'probability_of_loss': float((roi < 0).mean()),
+        'probability_of_total_loss': float((total_return <= 0).mean()),
+        'expected_profit': float(profit.mean()),
+        'value_at_risk': value_at_risk,
+    }
@@ -0,0 +1,201 @@
+# ==============================================================
+#  PDF Report Builder
+#
+# Charts are drawn on standalone Agg figures (no pyplot global state)
+# straight into PNG bytes, and the FPDF document embeds them from
+# memory, so building a report never touches the working directory
+# and any number of reports can be built at once. Each chart only
+# needs a small, picklable payload, so the charts of one report (or
+# the films of a slate) can be rendered on separate executor workers.
+#
+# Requires fpdf2 (in-memory images, bytes output).
+# ==============================================================
+
+import io
+
+import numpy as np
+
+CHART_KINDS = ('roi', 'return_composition', 'cash_flow')
+SCENARIO_COLORS = ['#d9534f', '#777777', '#5cb85c']
+
+_style_applied = False
+
+
+def chart_inputs(model):
+    """(kind, payload) for every report chart of an analysed model."""
+    names = list(model.results)
+    equity_principal = model.inputs['financing']['Equity_Investment']
+    total_returns = [model.results[n]['total_return'] for n in names]
+    cash_flow = np.asarray(model.results['Base Case']['cash_flow'], dtype=float)
+    return [
+        ('roi', {'title': model.title, 'scenarios': names,
+                 'roi_percent': [model.results[n]['roi'] * 100 for n in names]}),
+        ('return_composition', {'scenarios': names,
+                                'principal': [min(equity_principal, r) for r in total_returns],
+                                'profit': [max(0, r - equity_principal) for r in total_returns]}),
+        ('cash_flow', {'years': [f'Year {i}' for i in range(len(cash_flow))],
+                       'cumulative': np.cumsum(cash_flow).tolist()}),
+    ]
+
+
+def render_chart(kind, data):
+    """Renders one chart to PNG bytes."""
+    global _style_applied
+    import matplotlib.style
+    import matplotlib.ticker as mticker
+    from matplotlib.figure import Figure
+
+    if not _style_applied:
+        matplotlib.style.use('seaborn-v0_8-whitegrid')
+        _style_applied = True
+    money_format = mticker.FuncFormatter(lambda x, p: f'${x/1e6:.1f}M')
+
+    if kind == 'roi':
+        fig = Figure(figsize=(7, 5))
+        ax = fig.subplots()
+        ax.bar(data['scenarios'], data['roi_percent'], color=SCENARIO_COLORS)
+        ax.set_title(f'Investor ROI by Scenario for "{data["title"]}"', fontsize=14, pad=20)
+        ax.set_ylabel('Return on Investment (ROI %)')
+        ax.yaxis.set_major_formatter(mticker.PercentFormatter())
+    elif kind == 'return_composition':
+        fig = Figure(figsize=(8, 5))
+        ax = fig.subplots()
+        ax.bar(data['scenarios'], data['principal'], width=0.5, color='#3498db', label='Principal Recouped')
+        ax.bar(data['scenarios'], data['profit'], width=0.5, bottom=data['principal'], color='#2ecc71',
+               label='Profit (Premium & Split)')
+        ax.set_title('Composition of Investor Returns by Scenario', fontsize=14, pad=20)
+        ax.set_ylabel('Total Return (USD)')
+        ax.yaxis.set_major_formatter(money_format)
+        ax.legend()
+    elif kind == 'cash_flow':
+        fig = Figure(figsize=(8, 5))
+        ax = fig.subplots()
+        ax.plot(data['years'], data['cumulative'], marker='o', label='Cumulative Cash Flow')
+        ax.set_title('Base Case Cumulative Cash Flow to Equity', fontsize=14, pad=20)
+        ax.set_ylabel('Amount (USD)')
+        ax.set_xlabel('Year')
+        ax.axhline(0, color='grey', linestyle='--')
+        ax.yaxis.set_major_formatter(money_format)
+        ax.legend()
+    else:
+        raise ValueError(f"Unknown chart '{kind}'")
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def render_charts(model, map_fn=map):
+    """PNG bytes for every chart; pass an executor's map to render them in parallel."""
+    kinds, payloads = zip(*chart_inputs(model))
+    return list(map_fn(render_chart, kinds, payloads))
+
+
+def _table(pdf, rows, columns, title, index_name=''):
+    """Writes a bordered table; `rows` is a list of (label, [values])."""
+    pdf.set_font("helvetica", 'B', 12)
+    pdf.cell(0, 10, title, new_x="LMARGIN", new_y="NEXT", align='L')
+    pdf.set_font("helvetica", 'B', 9)
+
+    index_width = 70
+    col_width = (pdf.w - pdf.l_margin - pdf.r_margin - index_width) / len(columns)
+    pdf.cell(index_width, 8, index_name, border=1, align='C')
+    for col in columns:
+        pdf.cell(col_width, 8, str(col), border=1, align='C')
+    pdf.ln()
+
+    for label, values in rows:
+        pdf.set_font("helvetica", 'B' if 'Total' in str(label) else '', 9)
+        pdf.cell(index_width, 8, str(label), border=1, align='L')
+        for item in values:
+            text = f"{item:,.0f}" if isinstance(item, (int, float, np.number)) else str(item)
+            if '%' not in text and 'N/A' not in text:
+                text = text.replace('$-', '-$')
+            pdf.cell(col_width, 8, text, border=1, align='R')
+        pdf.ln()
+    pdf.set_font("helvetica", '', 9)
+    pdf.ln(8)
+
+
+def add_report_pages(pdf, model, charts):
+    """Appends one film's KPI, waterfall and chart pages to `pdf`."""
+    from waterfall_engine import LINE_ITEMS
+
+    pdf.add_page()
+    pdf.set_font("helvetica", 'B', 18)
+    pdf.cell(0, 10, f'Advanced Film Finance Analysis: "{model.title}"', new_x="LMARGIN", new_y="NEXT", align='C')
+    pdf.ln(5)
+
+    # Page 1: KPIs, Breakeven
+    pdf.set_font("helvetica", 'B', 14)
+    pdf.cell(0, 10, "1. Key Performance Indicators (KPIs)", new_x="LMARGIN", new_y="NEXT")
+    kpi_rows = [
+        (name, [res['gross_receipts'], res['total_return'], f"{res['roi']:.1%}",
+                f"{res['irr']:.1%}" if res['irr'] != -1.0 else "N/A"])
+        for name, res in model.results.items()
+    ]
+    _table(pdf, kpi_rows, ['Gross Receipts', 'Total Investor Return', 'Investor ROI', 'Investor IRR'],
+           "Scenario Summary")
+
+    pdf.set_font("helvetica", 'B', 12)
+    pdf.cell(0, 10, "Breakeven Analysis", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("helvetica", '', 10)
+    if np.isfinite(model.breakeven_receipts):
+        pdf.cell(0, 6, f"The film requires estimated Gross Receipts of ${model.breakeven_receipts:,.0f} "
+                       f"to break even (0% ROI).", new_x="LMARGIN", new_y="NEXT")
+    else:
+        pdf.cell(0, 6, "The film cannot break even under these terms at any level of Gross Receipts.",
+                 new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(10)
+
+    # Page 2: Annual Waterfall Tables
+    pdf.add_page()
+    pdf.set_font("helvetica", 'B', 14)
+    pdf.cell(0, 10, "2. Detailed Annual Waterfall (Year-by-Year)", new_x="LMARGIN", new_y="NEXT")
+    for name, res in model.results.items():
+        annual = np.asarray(res['annual_waterfall'])
+        _table(pdf, list(zip(LINE_ITEMS, annual.tolist())),
+               [f'Year {i+1}' for i in range(annual.shape[-1])], f"Analysis for: {name}")
+
+    # Page 3: Charts
+    pdf.add_page()
+    pdf.set_font("helvetica", 'B', 14)
+    pdf.cell(0, 10, "3. Analytical Charts", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(5)
+    for image in charts:
+        pdf.image(io.BytesIO(image), w=pdf.w - pdf.l_margin - pdf.r_margin)
+        pdf.ln(5)
+
+
+def build_pdf(films):
+    """PDF bytes for [(model, chart PNGs), ...]; one section per film."""
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    for model, charts in films:
+        add_report_pages(pdf, model, charts)
+    return bytes(pdf.output())
+
+
+# Executor entry points (module level so they pickle to process workers)
+
+def analyse_and_render(title, inputs):
+    """Runs one film's analysis and renders its charts; returns (raw_results, charts)."""
+    from film_finance_model import FilmFinanceModel
+
+    model = FilmFinanceModel(title, inputs)
+    model.run_full_analysis()
+    return model.raw_results, render_charts(model)
+
+
+def build_report_pdf(films):
+    """PDF bytes for [(title, inputs, raw_results, charts), ...]."""
+    from film_finance_model import FilmFinanceModel
+
+    models = []
+    for title, inputs, raw_results, charts in films:
+        model = FilmFinanceModel(title, inputs)
+        model.apply_results(raw_results)
+        models.append((model, charts))
+    return build_pdf(models)
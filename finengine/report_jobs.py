@@ -0,0 +1,97 @@
+# ==============================================================
+#  Background Report Jobs
+#
+# In-process registry for report builds that are too large to hold a
+# request open for (e.g. a whole slate). A job records its progress as
+# films finish and keeps the finished PDF in memory until it is fetched
+# or expires. Jobs live in the API process that created them, so with
+# several uvicorn workers the status/PDF calls need sticky routing.
+#
+# Configuration (environment):
+#   REPORT_JOB_TTL     seconds a finished job (and its PDF) is kept
+#   REPORT_MAX_JOBS    max jobs held at once; the oldest finished go first
+# ==============================================================
+
+import os
+import threading
+import time
+import uuid
+
+STATUSES = ('queued', 'running', 'done', 'failed')
+
+
+class ReportJob:
+    def __init__(self, total):
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'
+        self.total = total
+        self.completed = 0
+        self.error = None
+        self.result = None
+        self.filename = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.task = None  # keeps the asyncio task referenced while it runs
+
+    def finish(self, result, filename):
+        self.result, self.filename = result, filename
+        self.status, self.finished_at = 'done', time.time()
+
+    def fail(self, error):
+        self.error = error
+        self.status, self.finished_at = 'failed', time.time()
+
+    def summary(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "completed": self.completed,
+            "total": self.total,
+            "progress": round(self.completed / self.total, 4) if self.total else 1.0,
+            "error": self.error,
+        }
+
+
+class ReportJobs:
+    def __init__(self, ttl=3600, max_jobs=100):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(ttl=float(os.getenv("REPORT_JOB_TTL", "3600")),
+                   max_jobs=int(os.getenv("REPORT_MAX_JOBS", "100")))
+
+    def _evict(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.ttl:
+                del self._jobs[job_id]
+        finished = sorted((j for j in self._jobs.values() if j.finished_at is not None), key=lambda j: j.finished_at)
+        while len(self._jobs) >= self.max_jobs and finished:
+            del self._jobs[finished.pop(0).id]
+
+    def create(self, total):
+        """Registers a job; returns None when max_jobs are all still running."""
+        with self._lock:
+            self._evict()
+            if len(self._jobs) >= self.max_jobs:
+                return None
+            job = ReportJob(total)
+            self._jobs[job.id] = job
+            return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._evict()
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            self._evict()
+            counts = {status: 0 for status in STATUSES}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return {"jobs": len(self._jobs), "max_jobs": self.max_jobs, **counts}
@@ -0,0 +1,174 @@
+# ==============================================================
+#  Model Result Cache
+#
+# In-process LRU/TTL cache in front of FilmFinanceModel.run_full_analysis.
+# Entries are keyed on a canonical hash of the financial inputs (the
+# title is deliberately left out), so identical what-if payloads from
+# the frontend skip recomputation. An optional SQLite file lets several
+# uvicorn workers share entries.
+#
+# Configuration (environment):
+#   MODEL_CACHE_SIZE   max in-memory entries (0 disables the cache)
+#   MODEL_CACHE_TTL    seconds an entry stays valid
+#   MODEL_CACHE_PATH   optional SQLite file shared between workers
+# ==============================================================
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.number)):
+        # 4 and 4.0 describe the same deal
+        return float(value)
+    return value
+
+
+def canonical_key(inputs):
+    """Stable hash of the model inputs; dict order and int/float spelling don't matter."""
+    payload = json.dumps(_canonical(inputs), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SQLiteBackend:
+    """Shared on-disk store; safe to use from several processes."""
+
+    def __init__(self, path, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB, expires_at REAL, accessed_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    def get(self, key):
+        """Returns (value, seconds until the entry expires), or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return pickle.loads(row[0]), row[1] - now
+
+    def put(self, key, value):
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, blob, now + self.ttl, now)
+            )
+            self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+
+class ResultCache:
+    def __init__(self, max_entries=1024, ttl=3600, backend=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.shared_hits = 0
+
+    @classmethod
+    def from_env(cls):
+        max_entries = int(os.getenv("MODEL_CACHE_SIZE", "1024"))
+        ttl = float(os.getenv("MODEL_CACHE_TTL", "3600"))
+        path = os.getenv("MODEL_CACHE_PATH")
+        backend = SQLiteBackend(path, ttl, max(max_entries, 1) * 8) if path else None
+        return cls(max_entries, ttl, backend)
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+        shared = self.backend.get(key) if self.backend is not None else None
+        with self._lock:
+            if shared is None:
+                self.misses += 1
+                return None
+            value, remaining = shared
+            self.hits += 1
+            self.shared_hits += 1
+            # Keep the shared entry's expiry so the result never outlives MODEL_CACHE_TTL
+            self._store(key, value, now + min(self.ttl, remaining))
+        return value
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._store(key, value, time.monotonic() + self.ttl)
+        if self.backend is not None:
+            self.backend.put(key, value)
+
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "shared_backend": self.backend is not None,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -0,0 +1,161 @@
+# ==============================================================
+#  Filtered & Hybrid Search
+#
+# Attribute filters (revenue band, director, cast) are turned into a
+# row bitmap over the FAISS ids and passed to the index as an
+# IDSelector, so FAISS only scores matching rows and a filtered top-N
+# costs about the same as an unfiltered one. Director/cast postings and
+# keyword IDF are built offline by build_search_artifacts.py as flat
+# arrays (terms are looked up by a 64-bit hash in a sorted key array) and
+# memory-mapped like the metadata columns, so workers share one copy and
+# only build the row bitmaps a request needs.
+#
+# Hybrid ranking blends the (min-max normalised) vector score of a
+# candidate pool with an IDF-weighted keyword overlap on title/overview.
+# ==============================================================
+
+import hashlib
+import math
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("a an and are as at be by for from in into is it its of on or the to with".split())
+HYBRID_POOL_MIN = 50
+HYBRID_POOL_FACTOR = 4
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _names(value):
+    # TMDB cast/director fields are ", "-separated name lists
+    return [name.strip().lower() for name in value.split(",") if name.strip()] if isinstance(value, str) else []
+
+
+def _text(title, overview):
+    # missing values are None (columnar store) or NaN (pickled frame)
+    return " ".join(v for v in (title, overview) if isinstance(v, str))
+
+
+def term_key(term):
+    """Stable 64-bit key of a name or token (Python's hash() differs between processes)."""
+    return np.uint64(int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little"))
+
+
+def _find(keys, term):
+    """Position of `term` in a sorted key array, or -1."""
+    key = term_key(term)
+    i = int(np.searchsorted(keys, key))
+    return i if i < len(keys) and keys[i] == key else -1
+
+
+def _postings(values, prefix):
+    # Names are grouped by key; a (very unlikely) hash collision only widens a filter
+    rows = defaultdict(list)
+    for row, value in enumerate(values):
+        for key in {term_key(name) for name in _names(value)}:
+            rows[key].append(row)
+    keys = np.array(sorted(rows), dtype=np.uint64)
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum([len(rows[k]) for k in keys], out=offsets[1:])
+    ids = np.array([row for k in keys for row in rows[k]], dtype=np.int64)
+    return {f"{prefix}.keys": keys, f"{prefix}.offsets": offsets, f"{prefix}.rows": ids}
+
+
+def build_attribute_arrays(metadata):
+    """Director/cast postings and keyword IDF as flat arrays (written by build_search_artifacts.py)."""
+    every_row = np.arange(len(metadata["revenue"]))
+    doc_freq = Counter()
+    for title, overview in zip(metadata["title"][every_row], metadata["overview"][every_row]):
+        doc_freq.update({term_key(t) for t in tokenize(_text(title, overview))})
+    idf_keys = np.array(sorted(doc_freq), dtype=np.uint64)
+    counts = np.array([doc_freq[k] for k in idf_keys], dtype=np.float64)
+    return {
+        **_postings(metadata["director"][every_row], "director"),
+        **_postings(metadata["cast"][every_row], "cast"),
+        "idf.keys": idf_keys,
+        "idf.values": np.log(1 + len(every_row) / counts),
+    }
+
+
+class AttributeIndex:
+    """Director/cast postings and keyword IDF over the search metadata."""
+
+    def __init__(self, revenue, arrays):
+        self.revenue = revenue
+        self.rows = len(revenue)
+        self.arrays = arrays  # build_attribute_arrays output, usually memory-mapped
+
+    @classmethod
+    def from_metadata(cls, metadata):
+        """Builds the arrays in memory, for metadata without prebuilt artifacts."""
+        return cls(metadata["revenue"], build_attribute_arrays(metadata))
+
+    def _name_mask(self, prefix, name):
+        mask = np.zeros(self.rows, dtype=bool)
+        i = _find(self.arrays[f"{prefix}.keys"], name.strip().lower())
+        if i >= 0:
+            offsets = self.arrays[f"{prefix}.offsets"]
+            mask[self.arrays[f"{prefix}.rows"][offsets[i]:offsets[i + 1]]] = True
+        return mask
+
+    def _idf(self, term):
+        i = _find(self.arrays["idf.keys"], term)
+        return float(self.arrays["idf.values"][i]) if i >= 0 else 0.0
+
+    def mask(self, min_revenue=None, max_revenue=None, director=None, cast=None):
+        """Boolean row mask for the given filters, or None when nothing is filtered."""
+        mask = None
+        if min_revenue is not None or max_revenue is not None:
+            revenue = np.asarray(self.revenue)
+            mask = ~np.isnan(revenue)  # unknown revenue never falls inside a band
+            if min_revenue is not None:
+                mask &= revenue >= min_revenue
+            if max_revenue is not None:
+                mask &= revenue <= max_revenue
+        if director:
+            names = self._name_mask("director", director)
+            mask = names if mask is None else mask & names
+        for name in cast or []:
+            names = self._name_mask("cast", name)
+            mask = names if mask is None else mask & names
+        return mask
+
+    def keyword_scores(self, query, titles, overviews):
+        """Share of the query's IDF weight found in each candidate's title/overview, in [0, 1]."""
+        idf = {t: self._idf(t) for t in set(tokenize(query))}
+        total = sum(idf.values())
+        if not total:
+            return np.zeros(len(titles))
+        scores = []
+        for title, overview in zip(titles, overviews):
+            found = idf.keys() & set(tokenize(_text(title, overview)))
+            scores.append(sum(idf[t] for t in found) / total)
+        return np.array(scores)
+
+
+def search_params(faiss, index, mask, nprobe):
+    """FAISS search parameters restricting the search to `mask` (kept alive via the returned bitmap)."""
+    bitmap = np.packbits(mask, bitorder="little")
+    selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+    if hasattr(index, "nprobe"):
+        # Probe more lists for selective filters so ~the same number of matching vectors get scanned
+        selectivity = max(mask.mean(), 1.0 / len(mask))
+        probes = min(index.nlist, math.ceil(nprobe / selectivity))
+        return faiss.SearchParametersIVF(sel=selector, nprobe=probes), bitmap
+    return faiss.SearchParameters(sel=selector), bitmap
+
+
+def hybrid_rerank(keyword_scores, distances, indices, top_n, weight, higher_is_better):
+    """Re-ranks one candidate row (without -1 padding) by (1 - weight) * vector + weight * keyword score."""
+    if not indices.size:
+        return indices
+    vector = distances if higher_is_better else -distances
+    spread = vector.max() - vector.min()
+    vector = (vector - vector.min()) / spread if spread > 0 else np.ones_like(vector)
+    combined = (1 - weight) * vector + weight * keyword_scores
+    return indices[np.argsort(-combined, kind="stable")[:top_n]]
@@ -0,0 +1,110 @@
+# ==============================================================
+#  Search Artifact Store
+#
+# Read-only, memory-mappable versions of the search artifacts so that
+# every uvicorn worker on a box shares one page-cache copy instead of
+# unpickling its own DataFrame and FAISS index:
+#
+#   <dir>/index.flat.idx, <dir>/index.ivfpq.idx   FAISS indexes
+#   <dir>/metadata/manifest.json                  row count + columns
+#   <dir>/metadata/revenue.npy                    float64, NaN = unknown
+#   <dir>/metadata/<col>.offsets.npy              int64 (rows + 1)
+#   <dir>/metadata/<col>.data.bin                 concatenated UTF-8
+#   <dir>/metadata/<col>.missing.npy              bool
+#   <dir>/attributes/<name>.npy                   director/cast postings and
+#                                                 keyword IDF (search_filters.py)
+#
+# Build them from the current pickle/index with build_search_artifacts.py.
+# ==============================================================
+
+import json
+import os
+
+import numpy as np
+
+STRING_COLUMNS = ["title", "overview", "cast", "director"]
+NUMERIC_COLUMNS = ["revenue"]
+MANIFEST = "manifest.json"
+
+
+class StringColumn:
+    """Variable-length UTF-8 column; rows are decoded only when indexed."""
+
+    def __init__(self, offsets, data, missing):
+        self.offsets = offsets
+        self.data = data
+        self.missing = missing
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, indices):
+        indices = np.atleast_1d(indices)
+        starts, ends = self.offsets[indices], self.offsets[indices + 1]
+        values = np.empty(len(indices), dtype=object)
+        for i, (row, start, end) in enumerate(zip(indices, starts, ends)):
+            values[i] = None if self.missing[row] else bytes(self.data[start:end]).decode('utf-8')
+        return values
+
+
+def write_metadata_store(frame, path):
+    """Writes the response columns of the metadata frame as a columnar, mmap-able store."""
+    os.makedirs(path, exist_ok=True)
+    for col in STRING_COLUMNS:
+        values = frame[col]
+        missing = values.isna().to_numpy()
+        encoded = [b'' if gone else str(v).encode('utf-8') for v, gone in zip(values, missing)]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        with open(os.path.join(path, f"{col}.data.bin"), 'wb') as fh:
+            fh.write(b''.join(encoded))
+        np.save(os.path.join(path, f"{col}.offsets.npy"), offsets)
+        np.save(os.path.join(path, f"{col}.missing.npy"), missing)
+    for col in NUMERIC_COLUMNS:
+        np.save(os.path.join(path, f"{col}.npy"), frame[col].to_numpy(dtype=np.float64))
+    with open(os.path.join(path, MANIFEST), 'w') as fh:
+        json.dump({"rows": len(frame), "string_columns": STRING_COLUMNS, "numeric_columns": NUMERIC_COLUMNS}, fh)
+
+
+def has_metadata_store(path):
+    return os.path.exists(os.path.join(path, MANIFEST))
+
+
+def open_metadata_store(path):
+    """Maps the store read-only; returns {column: array-like} indexable by FAISS row ids."""
+    with open(os.path.join(path, MANIFEST)) as fh:
+        manifest = json.load(fh)
+    columns = {}
+    for col in manifest["string_columns"]:
+        data_path = os.path.join(path, f"{col}.data.bin")
+        # np.memmap can't map an empty file
+        data = (np.memmap(data_path, dtype=np.uint8, mode='r') if os.path.getsize(data_path)
+                else np.zeros(0, dtype=np.uint8))
+        columns[col] = StringColumn(
+            np.load(os.path.join(path, f"{col}.offsets.npy"), mmap_mode='r'),
+            data,
+            np.load(os.path.join(path, f"{col}.missing.npy"), mmap_mode='r'),
+        )
+    for col in manifest["numeric_columns"]:
+        columns[col] = np.load(os.path.join(path, f"{col}.npy"), mmap_mode='r')
+    return columns
+
+
+def write_attribute_store(arrays, path):
+    """Writes search_filters.build_attribute_arrays output as .npy files."""
+    os.makedirs(path, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), values)
+    with open(os.path.join(path, MANIFEST), 'w') as fh:
+        json.dump({"arrays": sorted(arrays)}, fh)
+
+
+def has_attribute_store(path):
+    return os.path.exists(os.path.join(path, MANIFEST))
+
+
+def open_attribute_store(path):
+    """Maps the attribute arrays read-only; returns {name: array}."""
+    with open(os.path.join(path, MANIFEST)) as fh:
+        manifest = json.load(fh)
+    return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in manifest["arrays"]}
@@ -1,43 +1,435 @@
-from fastapi import APIRouter, Query
-from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
-import faiss
-import joblib
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from collections import OrderedDict
+import asyncio
+import contextvars
+import logging
+import threading
+import time
 import numpy as np
-import pandas as pd
+import os
 
-# Load at startup
-model = SentenceTransformer("all-MiniLM-L6-v2")
-faiss_index = faiss.read_index("faiss_text_only.idx")
-metadata = joblib.load("metadata.pkl")
+from metrics import TimedRoute
+from timers import stage
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
 
-class SearchRequest(BaseModel):
+# The encoder, FAISS index and metadata are loaded lazily (or by a
+# background warm-up at app startup) so importing this module stays cheap.
+model = None
+faiss_index = None
+metadata = None
+attribute_index = None
+_load_lock = threading.Lock()
+_load_state = {"loading": False, "error": None, "load_seconds": None}
+_failed_at = None  # time.monotonic() of the last failed load
+SEARCH_LOAD_RETRY_SECONDS = float(os.getenv("SEARCH_LOAD_RETRY_SECONDS", "30"))
+
+
+class SearchUnavailable(Exception):
+    """A recent load failed; the next attempt is allowed after `retry_after` seconds."""
+
+    def __init__(self, error, retry_after):
+        super().__init__(error)
+        self.retry_after = retry_after
+
+RESULT_COLUMNS = ["title", "overview", "cast", "director", "revenue"]
+
+
+def column_store(frame):
+    """Holds only the response columns, as plain arrays (revenue as float64)."""
+    columns = {col: frame[col].to_numpy(dtype=object) for col in RESULT_COLUMNS if col != "revenue"}
+    columns["revenue"] = frame["revenue"].to_numpy(dtype=np.float64)
+    return columns
+
+
+# Shared artifacts written by build_search_artifacts.py. When present, the
+# index and metadata are memory-mapped read-only so all workers on a box
+# share one copy in the page cache; otherwise the legacy pickle is used.
+SEARCH_ARTIFACTS_DIR = os.getenv("SEARCH_ARTIFACTS_DIR", "search_artifacts")
+SEARCH_INDEX_VARIANT = os.getenv("SEARCH_INDEX_VARIANT", "flat")
+SEARCH_INDEX_MMAP = os.getenv("SEARCH_INDEX_MMAP", "1") != "0"
+SEARCH_IVF_NPROBE = int(os.getenv("SEARCH_IVF_NPROBE", "16"))
+
+
+def load_index(faiss):
+    path = os.path.join(SEARCH_ARTIFACTS_DIR, f"index.{SEARCH_INDEX_VARIANT}.idx")
+    if not os.path.exists(path):
+        if SEARCH_INDEX_VARIANT != "flat":
+            raise FileNotFoundError(f"No '{SEARCH_INDEX_VARIANT}' index at {path}; run build_search_artifacts.py")
+        path = "faiss_text_only.idx"
+    flags = 0
+    if SEARCH_INDEX_MMAP:
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_READ_ONLY
+    index = faiss.read_index(path, flags)
+    if hasattr(index, "nprobe"):
+        index.nprobe = SEARCH_IVF_NPROBE
+    return index
+
+
+def load_metadata():
+    from search_store import has_metadata_store, open_metadata_store
+
+    store = os.path.join(SEARCH_ARTIFACTS_DIR, "metadata")
+    if has_metadata_store(store):
+        return open_metadata_store(store)
+    import joblib
+    return column_store(joblib.load("metadata.pkl"))
+
+
+def load_attributes(metadata):
+    from search_filters import AttributeIndex
+    from search_store import has_attribute_store, open_attribute_store
+
+    store = os.path.join(SEARCH_ARTIFACTS_DIR, "attributes")
+    if has_attribute_store(store):
+        return AttributeIndex(metadata["revenue"], open_attribute_store(store))
+    logger.warning("No prebuilt search attributes at %s; building them in memory "
+                   "(run build_search_artifacts.py to share them between workers)", store)
+    return AttributeIndex.from_metadata(metadata)
+
+
+def load_search_resources():
+    """
+    Loads the encoder, FAISS index and metadata once; safe to call from any
+    thread. After a failure, calls raise SearchUnavailable until
+    SEARCH_LOAD_RETRY_SECONDS have passed instead of retrying the load.
+    """
+    global model, faiss_index, metadata, attribute_index, _failed_at
+    if metadata is not None:
+        return
+    with _load_lock:
+        if metadata is not None:
+            return
+        if _failed_at is not None:
+            wait = SEARCH_LOAD_RETRY_SECONDS - (time.monotonic() - _failed_at)
+            if wait > 0:
+                raise SearchUnavailable(_load_state["error"], wait)
+        _load_state.update(loading=True, error=None)
+        start = time.perf_counter()
+        try:
+            from sentence_transformers import SentenceTransformer
+            import faiss
+
+            loaded_model = SentenceTransformer("all-MiniLM-L6-v2")
+            loaded_index = load_index(faiss)
+            loaded_metadata = load_metadata()
+            if loaded_index.ntotal != len(loaded_metadata["revenue"]):
+                raise RuntimeError(f"Index has {loaded_index.ntotal} vectors but metadata has "
+                                   f"{len(loaded_metadata['revenue'])} rows")
+            loaded_attributes = load_attributes(loaded_metadata)
+        except Exception as e:
+            logger.exception("Failed to load search resources")
+            _load_state["error"] = str(e)
+            _failed_at = time.monotonic()
+            raise
+        finally:
+            _load_state["loading"] = False
+        model, faiss_index, attribute_index = loaded_model, loaded_index, loaded_attributes
+        _failed_at = None
+        metadata = loaded_metadata  # set last: a non-None metadata means search is ready
+        _load_state["load_seconds"] = round(time.perf_counter() - start, 3)
+        logger.info("Search resources loaded in %.2fs", _load_state["load_seconds"])
+
+
+def start_warmup():
+    """Loads search resources on a background thread so startup isn't blocked."""
+    def warm():
+        try:
+            load_search_resources()
+        except Exception:
+            pass  # recorded in _load_state, retried by the first search after the cooldown
+    threading.Thread(target=warm, name="search-warmup", daemon=True).start()
+
+
+def search_readiness():
+    return {"ready": metadata is not None, **_load_state}
+
+
+async def ensure_search_ready():
+    if metadata is None:
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, load_search_resources)
+        except SearchUnavailable as e:
+            raise HTTPException(status_code=503, detail=f"Search is unavailable: {str(e)}",
+                                headers={"Retry-After": str(max(1, round(e.retry_after)))})
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"Search is unavailable: {str(e)}",
+                                headers={"Retry-After": str(max(1, round(SEARCH_LOAD_RETRY_SECONDS)))})
+
+# Micro-batching: concurrent /search calls are collected for up to
+# SEARCH_BATCH_WAIT_MS (or SEARCH_BATCH_MAX queries) and then encoded and
+# searched together, which keeps the transformer and FAISS BLAS busy.
+SEARCH_BATCH_MAX = int(os.getenv("SEARCH_BATCH_MAX", "64"))
+SEARCH_BATCH_WAIT_MS = float(os.getenv("SEARCH_BATCH_WAIT_MS", "5"))
+MAX_BATCH_QUERIES = int(os.getenv("SEARCH_MAX_BATCH_QUERIES", "256"))
+MAX_TOP_N = int(os.getenv("SEARCH_MAX_TOP_N", "1000"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "4096"))
+
+router = APIRouter(route_class=TimedRoute)
+
+class SearchOptions(BaseModel):
+    # Pre-filters, applied inside the FAISS search (revenue in dollars; names case-insensitive)
+    min_revenue: Optional[float] = None
+    max_revenue: Optional[float] = None
+    director: Optional[str] = None
+    cast: Optional[List[str]] = None  # every listed actor must appear
+    # 0 = pure vector ranking, 1 = pure keyword ranking of the vector candidates
+    keyword_weight: float = Field(0.0, ge=0.0, le=1.0)
+
+    def filtered(self):
+        return (self.min_revenue is not None or self.max_revenue is not None or bool(self.director)
+                or bool(self.cast) or self.keyword_weight > 0)
+
+class SearchRequest(SearchOptions):
     query: str
-    top_n: int = 10
+    top_n: int = Field(10, ge=1, le=MAX_TOP_N)
 
-@router.post("/search")
-def search_movies(req: SearchRequest):
-    query_vec = model.encode([req.query], convert_to_numpy=True).astype(np.float32)
-    distances, indices = faiss_index.search(query_vec, req.top_n)
+class BatchSearchRequest(SearchOptions):
+    queries: List[str]
+    top_n: int = Field(10, ge=1, le=MAX_TOP_N)
+
+
+def normalize_query(query):
+    # all-MiniLM-L6-v2 is uncased, so case and spacing don't change the embedding
+    return " ".join(query.lower().split())
+
+
+def encode_queries(queries):
+    with stage("encode"):
+        return model.encode(queries, batch_size=len(queries), convert_to_numpy=True).astype(np.float32)
+
+
+class QueryCache:
+    """LRU of normalized query -> (embedding, top-k FAISS indices)."""
 
-    top_df = metadata.iloc[indices[0]].copy()
+    def __init__(self, max_entries=SEARCH_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, vector, indices):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (vector, indices)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries,
+                    "hits": self.hits, "misses": self.misses}
+
+
+query_cache = QueryCache()
+
+
+def encode_and_search(queries, top_n):
+    """Encodes and searches `queries` (already normalized) and caches each query's results."""
+    query_vecs = encode_queries(queries)
+    with stage("faiss"):
+        _, indices = faiss_index.search(query_vecs, top_n)
+    for key, vector, row in zip(queries, query_vecs, indices):
+        query_cache.put(key, vector, row)
+    return indices
+
+
+async def run_in_thread(fn, *args):
+    """Runs fn on the default thread pool inside the request's context, so its stage timings count towards it."""
+    return await asyncio.get_running_loop().run_in_executor(None, contextvars.copy_context().run, fn, *args)
+
+
+def search_cached_vector(key, vector, top_n):
+    with stage("faiss"):
+        _, indices = faiss_index.search(vector[None, :], top_n)
+    query_cache.put(key, vector, indices[0])
+    return indices[0]
+
+
+async def cached_search(key, top_n, encode_miss):
+    """Top-n indices for a normalized query from the cache, re-searching or encoding only when needed."""
+    entry = query_cache.get(key)
+    if entry is not None:
+        vector, indices = entry
+        if len(indices) >= top_n:
+            return indices[:top_n]
+        indices = await run_in_thread(search_cached_vector, key, vector, top_n)
+        return indices
+    return await encode_miss(key, top_n)
+
+
+class SearchBatcher:
+    def __init__(self, max_batch=SEARCH_BATCH_MAX, max_wait_ms=SEARCH_BATCH_WAIT_MS):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._pending = []
+        self._timer = None
+        self._tasks = set()  # the loop only keeps weak references to running tasks
+
+    async def search(self, query, top_n):
+        """Queues one query and waits for the batch it lands in; returns its FAISS indices row."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, top_n, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        queries = [query for query, _, _ in batch]
+        top_n = max(n for _, n, _ in batch)
+        try:
+            indices = await asyncio.get_running_loop().run_in_executor(None, encode_and_search, queries, top_n)
+        except Exception as e:
+            if len(batch) > 1:
+                # Retry one by one so a failing query only fails its own request
+                logger.warning("Search batch of %d failed (%s), retrying queries individually", len(batch), e)
+                await asyncio.gather(*(self._run([item]) for item in batch))
+                return
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for row, (_, n, future) in zip(indices, batch):
+            if not future.done():
+                future.set_result(row[:n])
+
+
+batcher = SearchBatcher()
+
+
+def filtered_search(queries, options, top_n):
+    """Top-n indices per normalized query, filtered inside FAISS and optionally hybrid re-ranked."""
+    import faiss
+    from search_filters import search_params, hybrid_rerank, HYBRID_POOL_FACTOR, HYBRID_POOL_MIN
+
+    with stage("filter"):
+        mask = attribute_index.mask(options.min_revenue, options.max_revenue, options.director, options.cast)
+    if mask is not None and not mask.any():
+        return [np.empty(0, dtype=np.int64) for _ in queries]
+
+    # Reuse cached embeddings; the cached top-k is unfiltered so it can't be reused
+    cached = [query_cache.get(query) for query in queries]
+    missing = [query for query, entry in zip(queries, cached) if entry is None]
+    encoded = dict(zip(missing, encode_queries(missing))) if missing else {}
+    vectors = np.stack([encoded[query] if entry is None else entry[0] for query, entry in zip(queries, cached)])
+
+    hybrid = options.keyword_weight > 0
+    pool = max(top_n * HYBRID_POOL_FACTOR, HYBRID_POOL_MIN) if hybrid else top_n
+    # `bitmap` backs the selector and must stay referenced until the search returns
+    params, bitmap = search_params(faiss, faiss_index, mask, SEARCH_IVF_NPROBE) if mask is not None else (None, None)
+    with stage("faiss"):
+        distances, indices = faiss_index.search(vectors, pool, params=params)
+    if not hybrid:
+        return list(indices)
+
+    higher_is_better = faiss_index.metric_type == faiss.METRIC_INNER_PRODUCT
+    results = []
+    with stage("rerank"):
+        for query, row_distances, row in zip(queries, distances, indices):
+            keep = row >= 0
+            row, row_distances = row[keep], row_distances[keep]
+            scores = attribute_index.keyword_scores(query, metadata["title"][row], metadata["overview"][row])
+            results.append(hybrid_rerank(scores, row_distances, row, top_n, options.keyword_weight, higher_is_better))
+    return results
+
+
+def _json_value(value):
+    # NaN isn't valid JSON; missing metadata comes back as null
+    return None if isinstance(value, float) and value != value else value
+
+
+def format_results(query, indices):
+    # FAISS pads with -1 when the index holds fewer than top_n vectors
+    indices = indices[indices >= 0]
 
     # Revenue stats
-    revs = top_df["revenue"].dropna()
+    revs = metadata["revenue"][indices]
+    revs = revs[~np.isnan(revs)]
     stats = {
-        "min": round(revs.min() / 1e6, 2),
-        "max": round(revs.max() / 1e6, 2),
-        "mean": round(revs.mean() / 1e6, 2),
-        "median": round(revs.median() / 1e6, 2),
-    }
+        "min": round(float(revs.min()) / 1e6, 2),
+        "max": round(float(revs.max()) / 1e6, 2),
+        "mean": round(float(revs.mean()) / 1e6, 2),
+        "median": round(float(np.median(revs)) / 1e6, 2),
+    } if revs.size else {"min": None, "max": None, "mean": None, "median": None}
 
     # Return matches
-    results = top_df[["title", "overview", "cast", "director", "revenue"]].to_dict(orient="records")
+    values = zip(*(metadata[col][indices].tolist() for col in RESULT_COLUMNS))
+    results = [{col: _json_value(v) for col, v in zip(RESULT_COLUMNS, row)} for row in values]
 
     return {
-        "query": req.query,
+        "query": query,
         "top_results": results,
         "revenue_millions": stats
-    }
\ No newline at end of file
+    }
+
+async def search_indices(query, top_n, options):
+    """FAISS row ids of the top_n matches for one query; the filtered path when `options` has filters."""
+    await ensure_search_ready()
+    if options.filtered():
+        rows = await run_in_thread(filtered_search, [normalize_query(query)], options, top_n)
+        indices = rows[0]
+    else:
+        indices = await cached_search(normalize_query(query), top_n, batcher.search)
+    return indices[indices >= 0]  # drop FAISS's -1 padding
+
+@router.post("/search")
+async def search_movies(req: SearchRequest):
+    indices = await search_indices(req.query, req.top_n, req)
+    with stage("metadata"):
+        return format_results(req.query, indices)
+
+@router.post("/search/batch")
+async def search_movies_batch(req: BatchSearchRequest):
+    if len(req.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_QUERIES} queries per request")
+    await ensure_search_ready()
+    keys = [normalize_query(query) for query in req.queries]
+    if req.filtered():
+        unique = list(dict.fromkeys(keys))
+        rows = await run_in_thread(filtered_search, unique, req, req.top_n)
+        found = dict(zip(unique, rows))
+        with stage("metadata"):
+            return {"results": [format_results(query, found[key]) for query, key in zip(req.queries, keys)]}
+    found, misses = {}, []
+    for key in dict.fromkeys(keys):
+        entry = query_cache.get(key)
+        if entry is not None and len(entry[1]) >= req.top_n:
+            found[key] = entry[1][:req.top_n]
+        else:
+            misses.append(key)
+    if misses:
+        indices = await run_in_thread(encode_and_search, misses, req.top_n)
+        found.update(zip(misses, indices))
+    with stage("metadata"):
+        return {"results": [format_results(query, found[key]) for query, key in zip(req.queries, keys)]}
+
+@router.get("/search/cache/stats")
+def search_cache_stats():
+    return query_cache.stats()
@@ -0,0 +1,122 @@
+# ==============================================================
+#  Sensitivity / Tornado Analysis
+#
+# Bumps every numeric waterfall_terms, financing and base_case_revenue
+# input by +/- X% and reports the change in ROI, IRR and breakeven.
+# The unperturbed deal and all 2 x N perturbed deals are stacked into
+# one engine call and one breakeven solve, so a full table costs about
+# the same as a single run.
+# ==============================================================
+
+import copy
+
+import numpy as np
+
+from breakeven import solve_breakeven, revenue_proportions
+from waterfall_engine import evaluate_waterfall, cash_flow_irr, stack_deal_terms, FINANCING_KEYS, TERM_KEYS
+
+SENSITIVITY_SECTIONS = ('waterfall_terms', 'financing', 'base_case_revenue')
+SCENARIO_MULTIPLIER_KEYS = {'Worst Case': 'Worst_Case', 'Best Case': 'Best_Case'}
+
+
+def sensitivity_parameters(inputs):
+    """All numeric inputs that can be bumped, as 'section.key' names."""
+    return [f"{section}.{key}" for section in SENSITIVITY_SECTIONS
+            for key, value in inputs[section].items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)]
+
+
+def _bumped(inputs, parameter, factor):
+    section, key = parameter.split('.', 1)
+    if section not in SENSITIVITY_SECTIONS or key not in inputs[section]:
+        raise ValueError(f"Unknown sensitivity parameter '{parameter}'")
+    deal = copy.copy(inputs)
+    deal[section] = dict(inputs[section])
+    deal[section][key] = inputs[section][key] * factor
+    return deal
+
+
+def _metric_summary(base, low, high, low_value, high_value):
+    width = high_value - low_value
+    return {
+        'low': low, 'high': high,
+        'delta_low': None if low is None or base is None else low - base,
+        'delta_high': None if high is None or base is None else high - base,
+        'swing': None if low is None or high is None else abs(high - low),
+        # Central finite difference: change in the metric per unit change of the input
+        'sensitivity': None if low is None or high is None or width == 0 else (high - low) / width,
+    }
+
+
+def finite_or_none(value, none_if=None):
+    """float(value), or None for NaN/inf and for `none_if` (e.g. the -1.0 IRR of a total loss)."""
+    value = float(value)
+    return None if not np.isfinite(value) or value == none_if else value
+
+
+def scenario_multiplier(inputs, scenario):
+    """Revenue multiplier a deal's scenario_multipliers give `scenario` ('Base Case' is 1)."""
+    if scenario == 'Base Case':
+        return 1.0
+    if scenario not in SCENARIO_MULTIPLIER_KEYS:
+        raise ValueError(f"Unknown scenario '{scenario}'")
+    return inputs['scenario_multipliers'][SCENARIO_MULTIPLIER_KEYS[scenario]]
+
+
+def run_sensitivity(inputs, bump=0.10, parameters=None, scenario='Base Case'):
+    """
+    Tornado table for one scenario: every parameter is evaluated at
+    (1 - bump) and (1 + bump) times its value, everything else held fixed.
+    Parameters are returned sorted by ROI swing, largest first.
+    """
+    if not 0 < bump < 1:
+        raise ValueError("bump must be between 0 and 1 (e.g. 0.1 for +/-10%)")
+    multiplier = scenario_multiplier(inputs, scenario)
+    parameters = list(parameters) if parameters is not None else sensitivity_parameters(inputs)
+
+    deals = [inputs]
+    for parameter in parameters:
+        deals.append(_bumped(inputs, parameter, 1 - bump))
+        deals.append(_bumped(inputs, parameter, 1 + bump))
+
+    domestic = np.array([d['base_case_revenue']['Domestic'] for d in deals], dtype=float) * multiplier
+    foreign = np.array([d['base_case_revenue']['Foreign'] for d in deals], dtype=float) * multiplier
+    other = np.array([sum(d['base_case_revenue'].values()) for d in deals], dtype=float) * multiplier - domestic - foreign
+    fin = stack_deal_terms([d['financing'] for d in deals], FINANCING_KEYS)
+    terms = stack_deal_terms([d['waterfall_terms'] for d in deals], TERM_KEYS)
+    tl = inputs['timeline']
+
+    res = evaluate_waterfall(domestic, foreign, fin, terms, tl['revenue_recognition_schedule'],
+                             tl['projection_years'], other_revenue=other, compute_irr=False, line_items=False)
+    irr = cash_flow_irr(res['cash_flow'], res['total_return'])
+    proportions = [revenue_proportions(d['base_case_revenue']) for d in deals]
+    breakeven = solve_breakeven({k: np.array([p[k] for p in proportions]) for k in ('Domestic', 'Foreign')},
+                                fin, terms, tl['revenue_recognition_schedule'], tl['projection_years'])
+
+    roi = [finite_or_none(v) for v in res['roi']]
+    irr = [finite_or_none(v, none_if=-1.0) for v in irr]
+    breakeven = [finite_or_none(v) for v in breakeven]
+
+    table = []
+    for i, parameter in enumerate(parameters):
+        lo, hi = 2 * i + 1, 2 * i + 2
+        section, key = parameter.split('.', 1)
+        base_value = inputs[section][key]
+        low_value, high_value = base_value * (1 - bump), base_value * (1 + bump)
+        table.append({
+            'parameter': parameter,
+            'base_value': base_value,
+            'low_value': low_value,
+            'high_value': high_value,
+            'roi': _metric_summary(roi[0], roi[lo], roi[hi], low_value, high_value),
+            'irr': _metric_summary(irr[0], irr[lo], irr[hi], low_value, high_value),
+            'breakeven_receipts': _metric_summary(breakeven[0], breakeven[lo], breakeven[hi], low_value, high_value),
+        })
+    table.sort(key=lambda row: row['roi']['swing'] or 0.0, reverse=True)
+
+    return {
+        'scenario': scenario,
+        'bump': bump,
+        'base': {'roi': roi[0], 'irr': irr[0], 'breakeven_receipts': breakeven[0]},
+        'parameters': table,
+    }
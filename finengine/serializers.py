@@ -0,0 +1,90 @@
+# ==============================================================
+#  Response Serializers
+#
+# Renders the large chart responses without going through FastAPI's
+# jsonable_encoder, which walks every value in Python before the JSON
+# encoder walks them again. orjson (if installed) writes dicts, lists
+# and numpy arrays straight to bytes; MessagePack is served instead
+# when the client prefers it in its Accept header, e.g.
+# `Accept: application/msgpack`. Neither package is required: without
+# orjson the standard json module is used, and a client that accepts
+# only MessagePack gets 406 when msgpack is not installed.
+# ==============================================================
+
+import json
+
+import numpy as np
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional format
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+JSON_TYPES = ("application/json", "application/*", "*/*")
+
+
+def _builtin(value):
+    """Fallback for values the encoders don't handle natively (numpy arrays and scalars)."""
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def _accept_quality(accept, media_types):
+    """Highest q the Accept header gives any of media_types (0 if none are listed)."""
+    best = 0.0
+    for entry in accept.split(","):
+        media_type, *params = (part.strip() for part in entry.split(";"))
+        if media_type.lower() not in media_types:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        best = max(best, q)
+    return best
+
+
+def wants_msgpack(accept):
+    """True when the Accept header prefers MessagePack over JSON."""
+    if not accept:
+        return False
+    msgpack_q = _accept_quality(accept, MSGPACK_TYPES)
+    return msgpack_q > 0 and msgpack_q >= _accept_quality(accept, JSON_TYPES)
+
+
+def dumps_json(content):
+    if orjson is not None:
+        return orjson.dumps(content, default=_builtin, option=orjson.OPT_SERIALIZE_NUMPY)
+    # Same output settings as starlette's JSONResponse
+    return json.dumps(content, default=_builtin, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def dumps_msgpack(content):
+    return msgpack.packb(content, default=_builtin)
+
+
+def negotiated_response(content, accept=None, status_code=200):
+    """JSON (orjson when available) or MessagePack response, as the Accept header prefers."""
+    if wants_msgpack(accept):
+        if msgpack is not None:
+            return Response(dumps_msgpack(content), status_code=status_code, media_type=MSGPACK_MEDIA_TYPE)
+        if _accept_quality(accept, JSON_TYPES) == 0:
+            raise HTTPException(status_code=406, detail="MessagePack responses need the msgpack package; "
+                                                        "accept application/json instead")
+    return Response(dumps_json(content), status_code=status_code, media_type=JSON_MEDIA_TYPE)
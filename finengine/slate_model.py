@@ -0,0 +1,215 @@
+# ==============================================================
+#  Slate / Portfolio Model
+#
+# Runs a whole slate of films (one FilmFinanceModel-style inputs dict
+# each) through the vectorized waterfall at once: every film's revenue,
+# financing, terms and recognition schedule is stacked into per-film
+# arrays. Investor cash flows are aggregated by calendar year (films may
+# start in different years) to give portfolio ROI / IRR and
+# concentration statistics.
+#
+# The Monte Carlo mode multiplies each film's revenue by a mean-one
+# lognormal shock built from a one-factor model: log shocks share a
+# common market factor, so any two films' shocks have correlation
+# `correlation`. Draws are processed in chunks of films x draws cells.
+# ==============================================================
+
+import numpy as np
+
+from monte_carlo import DEFAULT_PERCENTILES, distribution_summary
+from sensitivity import finite_or_none, scenario_multiplier
+from waterfall_engine import evaluate_waterfall, cash_flow_irr, stack_deal_terms, FINANCING_KEYS, TERM_KEYS
+
+MAX_SLATE_CELLS = 10_000_000  # films x draws per Monte Carlo run
+
+
+def stack_slate(films, scenario='Base Case', start_years=None):
+    """
+    Stacks the films' inputs into per-film arrays. Shorter recognition
+    schedules are zero-padded to the longest one and every cash flow
+    runs to the longest projection, which leaves ROI and IRR unchanged.
+    """
+    if not films:
+        raise ValueError("a slate needs at least one film")
+    multiplier = np.array([scenario_multiplier(f, scenario) for f in films], dtype=float)
+    n = len(films)
+    start_years = np.zeros(n, dtype=int) if start_years is None else np.asarray(start_years, dtype=int)
+    if start_years.shape != (n,) or np.any(start_years < 0):
+        raise ValueError("start_years needs one non-negative year offset per film")
+
+    schedules = [np.atleast_1d(np.asarray(f['timeline']['revenue_recognition_schedule'], dtype=float)) for f in films]
+    for i, (film, schedule) in enumerate(zip(films, schedules)):
+        if len(schedule) > film['timeline']['projection_years'] - 1:
+            raise ValueError(f"film {i}: revenue_recognition_schedule is longer than projection_years allows")
+    schedule = np.zeros((n, max(len(s) for s in schedules)))
+    for i, s in enumerate(schedules):
+        schedule[i, :len(s)] = s
+
+    revenue = [f['base_case_revenue'] for f in films]
+    domestic = np.array([r['Domestic'] for r in revenue], dtype=float) * multiplier
+    foreign = np.array([r['Foreign'] for r in revenue], dtype=float) * multiplier
+    other = np.array([sum(r.values()) for r in revenue], dtype=float) * multiplier - domestic - foreign
+
+    financing = stack_deal_terms([f['financing'] for f in films], FINANCING_KEYS)
+    equity = financing['Equity_Investment']
+    if equity.sum() <= 0:
+        raise ValueError("a slate needs a positive total Equity_Investment")
+    projection_years = max(f['timeline']['projection_years'] for f in films)
+    return {
+        'domestic': domestic, 'foreign': foreign, 'other': other,
+        'financing': financing, 'terms': stack_deal_terms([f['waterfall_terms'] for f in films], TERM_KEYS),
+        'schedule': schedule, 'projection_years': projection_years,
+        'start_years': start_years, 'horizon': int(start_years.max()) + projection_years,
+        'equity': equity, 'weights': equity / equity.sum(),
+    }
+
+
+def _evaluate(slate, shock=1.0, compute_irr=False):
+    return evaluate_waterfall(slate['domestic'] * shock, slate['foreign'] * shock, slate['financing'], slate['terms'],
+                              slate['schedule'], slate['projection_years'], other_revenue=slate['other'] * shock,
+                              compute_irr=compute_irr, line_items=False)
+
+
+def portfolio_cash_flow(cash_flow, start_years, horizon):
+    """Sums per-film cash flows (..., films, years) into calendar years (..., horizon)."""
+    total = np.zeros(cash_flow.shape[:-2] + (horizon,))
+    years = cash_flow.shape[-1]
+    for start in np.unique(start_years):
+        total[..., start:start + years] += cash_flow[..., start_years == start, :].sum(axis=-2)
+    return total
+
+
+def _concentration(weights):
+    hhi = float((weights ** 2).sum())
+    return {
+        'herfindahl_index': hhi,
+        'effective_number_of_films': 1 / hhi,
+        'largest_equity_share': float(weights.max()),
+        'top_5_equity_share': float(np.sort(weights)[-5:].sum()),
+    }
+
+
+def run_slate(films, start_years=None, scenario='Base Case'):
+    """
+    Deterministic slate run for one scenario: per-film ROI / IRR plus the
+    portfolio's calendar-year cash flows, ROI, IRR and concentration.
+    """
+    slate = stack_slate(films, scenario, start_years)
+    res = _evaluate(slate, compute_irr=True)
+    cash_flow = portfolio_cash_flow(res['cash_flow'], slate['start_years'], slate['horizon'])
+    equity, inflows = slate['equity'].sum(), res['total_return'].sum()
+    roi = res['roi']
+    portfolio_irr = cash_flow_irr(cash_flow, inflows)
+
+    return {
+        'scenario': scenario,
+        'n_films': len(films),
+        'equity_invested': float(equity),
+        'total_return': float(inflows),
+        'profit': float(inflows - equity),
+        'roi': float((inflows - equity) / equity),
+        'irr': finite_or_none(portfolio_irr, none_if=-1.0),
+        'cash_flow_by_year': cash_flow.tolist(),
+        'cumulative_cash_flow': np.cumsum(cash_flow).tolist(),
+        'diversification': {
+            **_concentration(slate['weights']),
+            'share_of_films_losing': float((roi < 0).mean()),
+            'share_of_equity_losing': float(slate['weights'][roi < 0].sum()),
+            'roi_dispersion': float(np.sqrt((slate['weights'] * (roi - roi @ slate['weights']) ** 2).sum())),
+        },
+        'films': [
+            {'start_year': int(s), 'equity': float(e), 'equity_share': float(w), 'roi': float(r),
+             'irr': finite_or_none(i, none_if=-1.0), 'total_return': float(t)}
+            for s, e, w, r, i, t in zip(slate['start_years'], slate['equity'], slate['weights'], roi,
+                                        res['irr'], res['total_return'])
+        ],
+    }
+
+
+def revenue_shocks(n_draws, n_films, sigma, correlation, rng):
+    """Mean-one lognormal shocks (n_draws, n_films) whose logs have pairwise correlation `correlation`."""
+    if not 0 <= correlation <= 1:
+        raise ValueError("correlation must be between 0 and 1")
+    sigma = np.asarray(sigma, dtype=float)
+    if sigma.ndim and sigma.shape != (n_films,):
+        raise ValueError("sigma needs one value, or one per film")
+    sigma = np.broadcast_to(sigma, (n_films,))
+    if np.any(sigma < 0):
+        raise ValueError("sigma must be non-negative")
+    z = np.sqrt(1 - correlation) * rng.standard_normal((n_draws, n_films))
+    z += np.sqrt(correlation) * rng.standard_normal((n_draws, 1))
+    z *= sigma
+    z -= 0.5 * sigma ** 2
+    return np.exp(z, out=z)
+
+
+def run_slate_monte_carlo(films, start_years=None, n_draws=10_000, sigma=0.5, correlation=0.3, seed=None,
+                          scenario='Base Case', percentiles=DEFAULT_PERCENTILES, chunk_cells=1_000_000):
+    """
+    Portfolio ROI / IRR distributions under correlated revenue shocks.
+
+    `sigma` is the log-space std of each film's shock (scalar or one per
+    film). Diversification compares the portfolio ROI spread with the
+    equity-weighted spread of the films on their own.
+    """
+    n = len(films)
+    if n_draws < 1 or n * n_draws > MAX_SLATE_CELLS:
+        raise ValueError(f"films x n_draws must be between 1 and {MAX_SLATE_CELLS:,}")
+    slate = stack_slate(films, scenario, start_years)
+    rng = np.random.default_rng(seed)
+    shocks = revenue_shocks(n_draws, n, sigma, correlation, rng)
+
+    cash_flow = np.empty((n_draws, slate['horizon']))
+    inflows = np.empty(n_draws)
+    roi_sum, roi_sq_sum, losses = np.zeros(n), np.zeros(n), np.zeros(n)
+    step = max(1, chunk_cells // n)
+    for start in range(0, n_draws, step):
+        chunk = slice(start, min(start + step, n_draws))
+        res = _evaluate(slate, shocks[chunk])
+        cash_flow[chunk] = portfolio_cash_flow(res['cash_flow'], slate['start_years'], slate['horizon'])
+        inflows[chunk] = res['total_return'].sum(axis=-1)
+        roi = res['roi']
+        roi_sum += roi.sum(axis=0)
+        roi_sq_sum += (roi ** 2).sum(axis=0)
+        losses += (roi < 0).sum(axis=0)
+
+    equity = slate['equity'].sum()
+    portfolio_roi = (inflows - equity) / equity
+    portfolio_irr = cash_flow_irr(cash_flow, inflows)
+    film_mean = roi_sum / n_draws
+    film_std = np.sqrt(np.maximum(roi_sq_sum / n_draws - film_mean ** 2, 0.0))
+
+    # Portfolio ROI is the equity-weighted film ROI, so its variance splits into
+    # the films' own variance plus an average pairwise correlation term
+    w = slate['weights']
+    portfolio_std = float(portfolio_roi.std())
+    standalone = float(w @ film_std)
+    own = float(((w * film_std) ** 2).sum())
+    cross = standalone ** 2 - own
+
+    return {
+        'scenario': scenario,
+        'n_films': n,
+        'n_draws': n_draws,
+        'seed': seed,
+        'correlation': correlation,
+        'roi': distribution_summary(portfolio_roi, percentiles),
+        'irr': distribution_summary(portfolio_irr, percentiles),
+        'probability_of_loss': float((portfolio_roi < 0).mean()),
+        'expected_profit': float(inflows.mean() - equity),
+        'cash_flow_by_year': {
+            'mean': cash_flow.mean(axis=0).tolist(),
+            **{f"p{p}": v.tolist() for p, v in zip((5, 50, 95), np.percentile(cash_flow, (5, 50, 95), axis=0))},
+        },
+        'diversification': {
+            **_concentration(w),
+            'portfolio_roi_std': portfolio_std,
+            'standalone_roi_std': standalone,
+            'diversification_ratio': standalone / portfolio_std if portfolio_std > 0 else None,
+            'implied_average_correlation': (portfolio_std ** 2 - own) / cross if cross > 0 else None,
+        },
+        'films': [
+            {'roi_mean': float(m), 'roi_std': float(s), 'probability_of_loss': float(l / n_draws)}
+            for m, s, l in zip(film_mean, film_std, losses)
+        ],
+    }
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The finengine modules import each other by bare name (`from waterfall_engine import ...`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# film_report_api reads these at import time: run models inline and don't load search
+os.environ.setdefault("API_KEY", "test")
+os.environ["MODEL_EXECUTOR"] = "inline"
+os.environ["SEARCH_WARMUP"] = "0"
+os.environ.pop("MODEL_CACHE_PATH", None)
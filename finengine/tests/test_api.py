@@ -0,0 +1,163 @@
+import copy
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import film_finance_model as ffm
+import film_report_api as api
+
+HEADERS = {"x-api-key": os.environ["API_KEY"]}
+HURDLES = {"roi": [0.2], "irr": [0.15]}
+
+
+def deal(title="Test Film", **changes):
+    payload = copy.deepcopy({
+        "title": title, "budget": ffm.budget, "financing": ffm.financing,
+        "base_case_revenue": ffm.base_case_revenue, "scenario_multipliers": ffm.scenario_multipliers,
+        "waterfall_terms": ffm.waterfall_terms, "timeline": {**ffm.timeline, "revenue_recognition_schedule":
+                                                             list(ffm.timeline["revenue_recognition_schedule"])},
+    })
+    for section, values in changes.items():
+        payload[section].update(values)
+    return payload
+
+
+@pytest.fixture
+def client():
+    api.result_cache.clear()
+    with TestClient(api.app) as client:
+        yield client
+    api.result_cache.clear()
+
+
+def test_report_then_models_keeps_breakeven_targets(client):
+    payload = {**deal(), "breakeven_targets": HURDLES}
+    report = client.post("/models/report", json=payload, headers=HEADERS)
+    assert report.status_code == 200
+    assert report.headers["content-type"] == "application/pdf"
+
+    # Served from the entry the report cached under the same key
+    response = client.post("/models", json=payload, headers=HEADERS)
+    assert response.status_code == 200
+    targets = response.json()["breakeven_targets"]
+    assert [t["target"] for t in targets["roi"]] == [0.2]
+    assert [t["target"] for t in targets["irr"]] == [0.15]
+    assert api.result_cache.stats()["hits"] >= 1
+
+
+def test_batch_reports_per_item_errors_in_order(client):
+    financing = dict(ffm.financing)
+    del financing["Debt_Financing"]
+    missing_key = deal("Missing Key")
+    missing_key["financing"] = financing
+    items = [
+        deal("First"),
+        {"title": "Invalid"},  # fails validation
+        missing_key,
+        deal("Zero Revenue", base_case_revenue={"Domestic": 0, "Foreign": 0}),
+        deal("Last", base_case_revenue={"Domestic": 9_000_000}),
+    ]
+    response = client.post("/models/batch", json={"items": items}, headers=HEADERS)
+    assert response.status_code == 200
+    results = response.json()["results"]
+
+    assert [r["index"] for r in results] == list(range(len(items)))
+    assert [r["ok"] for r in results] == [True, False, False, False, True]
+    assert [r["title"] for r in results if r["ok"]] == ["First", "Last"]
+    assert {e["loc"][0] for e in results[1]["error"]} >= {"budget", "financing"}
+    assert "Debt_Financing" in results[2]["error"]
+    assert "base_case_revenue" in results[3]["error"]
+
+    # Each item matches the same deal posted on its own
+    single = client.post("/models", json=items[4], headers=HEADERS).json()
+    assert results[4]["data"] == single
+    assert results[0]["data"]["roi_percent"] != results[4]["data"]["roi_percent"]
+
+
+def test_batch_kpis_only(client):
+    response = client.post("/models/batch", json={"items": [deal()], "kpis_only": True}, headers=HEADERS)
+    data = response.json()["results"][0]["data"]
+    assert set(data) == set(api.KPI_FIELDS) - {"breakeven_targets"}
+
+
+def test_batch_rejects_oversized_requests(client, monkeypatch):
+    monkeypatch.setattr(api, "MAX_BATCH_ITEMS", 2)
+    response = client.post("/models/batch", json={"items": [deal()] * 3}, headers=HEADERS)
+    assert response.status_code == 413
+
+
+def test_fields_returns_only_the_requested_sections(client):
+    response = client.post("/models?fields=roi_percent,irr_percent", json=deal(), headers=HEADERS)
+    assert response.status_code == 200
+    assert set(response.json()) == {"roi_percent", "irr_percent"}
+
+    full = client.post("/models", json=deal(), headers=HEADERS).json()
+    assert set(full) == set(api.CHART_FIELDS) - {"breakeven_targets"}
+    assert response.json()["roi_percent"] == full["roi_percent"]
+
+    batch = client.post("/models/batch", json={"items": [deal()], "fields": ["scenarios"]}, headers=HEADERS)
+    assert batch.json()["results"][0]["data"] == {"scenarios": full["scenarios"]}
+
+
+def test_annual_waterfall_matrix_matches_nested_waterfalls(client):
+    response = client.post("/models?fields=annual_waterfalls,annual_waterfall_matrix", json=deal(), headers=HEADERS)
+    body = response.json()
+    matrix, nested = body["annual_waterfall_matrix"], body["annual_waterfalls"]
+    for scenario, rows in matrix["scenarios"].items():
+        for j, year in enumerate(matrix["years"]):
+            for i, item in enumerate(matrix["line_items"]):
+                assert rows[i][j] == nested[scenario][year][item]
+
+
+def test_unknown_field_is_rejected(client):
+    response = client.post("/models?fields=roi_percent,bogus", json=deal(), headers=HEADERS)
+    assert response.status_code == 400
+    assert "bogus" in response.json()["detail"]
+    batch = client.post("/models/batch", json={"items": [deal()], "fields": ["bogus"]}, headers=HEADERS)
+    assert batch.status_code == 400
+
+
+def test_msgpack_only_clients_get_406_without_msgpack(client, monkeypatch):
+    import serializers
+
+    monkeypatch.setattr(serializers, "msgpack", None)
+    only_msgpack = client.post("/models", json=deal(), headers={**HEADERS, "accept": "application/msgpack"})
+    assert only_msgpack.status_code == 406
+    either = client.post("/models", json=deal(),
+                         headers={**HEADERS, "accept": "application/msgpack, application/json;q=0.5"})
+    assert either.status_code == 200
+    assert either.headers["content-type"] == "application/json"
+
+
+def test_non_finite_values_render_as_null_without_orjson(client, monkeypatch):
+    import serializers
+
+    payload = deal(financing={"Equity_Investment": 0})
+    with_orjson = client.post("/models", json=payload, headers=HEADERS)
+    monkeypatch.setattr(serializers, "orjson", None)
+    api.result_cache.clear()
+    without = client.post("/models", json=payload, headers=HEADERS)
+    assert with_orjson.status_code == without.status_code == 200
+    assert with_orjson.json() == without.json()
+    assert without.json()["scenario_summary"]["base_case"]["irr"] is None
+
+
+def test_grid_rejects_oversized_axes_before_building_them(client):
+    axis = {"parameter": "base_case_revenue.Domestic", "start": 0, "stop": 1e7, "steps": 1_000_000_000}
+    y = {"parameter": "base_case_revenue.Foreign", "values": [1e6, 2e6]}
+    response = client.post("/models/grid", json={**deal(), "x": axis, "y": y}, headers=HEADERS)
+    assert response.status_code == 422
+
+    too_many = {"parameter": "base_case_revenue.Domestic", "values": [1.0] * (api.MAX_GRID_CELLS + 1)}
+    response = client.post("/models/grid", json={**deal(), "x": too_many, "y": y}, headers=HEADERS)
+    assert response.status_code == 422
+
+
+def test_grid_sweep(client):
+    x = {"parameter": "base_case_revenue.Domestic", "start": 0, "stop": 1e7, "steps": 3}
+    y = {"parameter": "base_case_revenue.Foreign", "values": [1e6, 2e6]}
+    response = client.post("/models/grid", json={**deal(), "x": x, "y": y}, headers=HEADERS)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["shape"] == [2, 3] and len(body["roi"]) == 2 and len(body["roi"][0]) == 3
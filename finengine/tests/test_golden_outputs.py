@@ -0,0 +1,25 @@
+# Regression guard: engine results must match benchmarks/golden_outputs.json (refresh with --update-golden)
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import run_benchmarks  # noqa: E402
+
+with open(run_benchmarks.GOLDEN_PATH) as f:
+    EXPECTED = json.load(f)["engine"]
+
+
+@pytest.fixture(scope="module")
+def engine_outputs():
+    return json.loads(json.dumps(run_benchmarks.engine_golden(), default=float))
+
+
+@pytest.mark.parametrize("section", sorted(EXPECTED))
+def test_engine_matches_golden(engine_outputs, section):
+    assert section in engine_outputs
+    mismatches = run_benchmarks.compare(EXPECTED[section], engine_outputs[section], section)
+    assert not mismatches, "\n".join(mismatches[:20])
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from irr_solver import solve_irr
+
+npf = pytest.importorskip("numpy_financial")
+
+
+def npf_rates(rows):
+    return np.array([npf.irr(row) for row in rows])
+
+
+def assert_matches_npf(rows):
+    expected = npf_rates(rows)
+    actual = solve_irr(rows)
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-9, equal_nan=True)
+
+
+def test_conventional_flows():
+    # One outlay, then receipts: the shape of every investor cash flow
+    rng = np.random.default_rng(0)
+    rows = rng.uniform(0, 5e6, (500, 6))
+    rows[:, 0] = -rng.uniform(1e6, 1e7, 500)
+    assert_matches_npf(rows)
+
+
+def test_several_outlays_then_receipts():
+    rng = np.random.default_rng(1)
+    rows = rng.uniform(1e5, 3e6, (500, 8))
+    rows[:, :3] *= -1
+    assert_matches_npf(rows)
+
+
+def test_multiple_sign_changes():
+    rng = np.random.default_rng(2)
+    rows = rng.normal(0, 1e6, (500, 7))
+    rows[:, 0] = -np.abs(rows[:, 0])
+    assert_matches_npf(rows)
+
+
+def test_zero_padded_rows():
+    # Leading, trailing and interior zeros, as left by zero-padded schedules and slate start years
+    rng = np.random.default_rng(3)
+    rows = np.zeros((400, 9))
+    for row, lead, length in zip(rows, rng.integers(0, 3, 400), rng.integers(3, 7, 400)):
+        row[lead] = -rng.uniform(1e6, 5e6)
+        row[lead + 1:lead + length] = rng.uniform(0, 2e6, length - 1) * (rng.random(length - 1) < 0.8)
+    assert_matches_npf(rows)
+
+
+def test_no_rate_is_nan():
+    rows = np.array([[-1.0, -2.0, -3.0], [1.0, 2.0, 0.0], [0.0, 0.0, 0.0]])
+    assert np.isnan(solve_irr(rows)).all()
+    assert np.isnan(npf_rates(rows)).all()
+
+
+def test_keeps_leading_dimensions():
+    rng = np.random.default_rng(4)
+    flows = rng.uniform(0, 1e6, (3, 4, 5))
+    flows[..., 0] = -2e6
+    rates = solve_irr(flows)
+    assert rates.shape == (3, 4)
+    np.testing.assert_allclose(rates.ravel(), npf_rates(flows.reshape(-1, 5)), rtol=0, atol=1e-9)
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from result_cache import ResultCache, SQLiteBackend
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+def test_lru_eviction_drops_least_recently_used(clock):
+    cache = ResultCache(max_entries=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache(max_entries=8, ttl=60)
+    cache.put("a", 1)
+    clock.now += 59
+    assert cache.get("a") == 1
+    clock.now += 2
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_disabled_cache_stores_nothing(clock):
+    cache = ResultCache(max_entries=0, ttl=60)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+
+def test_shared_backend_hit_and_miss(clock, tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer = ResultCache(max_entries=8, ttl=60, backend=SQLiteBackend(path, 60, 64))
+    reader = ResultCache(max_entries=8, ttl=60, backend=SQLiteBackend(path, 60, 64))
+    writer.put("a", {"roi": 0.2})
+
+    assert reader.get("a") == {"roi": 0.2}
+    assert reader.get("missing") is None
+    stats = reader.stats()
+    assert stats["shared_hits"] == 1 and stats["misses"] == 1 and stats["entries"] == 1
+
+
+def test_shared_hit_keeps_backend_expiry(clock, tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer = ResultCache(max_entries=8, ttl=60, backend=SQLiteBackend(path, 60, 64))
+    reader = ResultCache(max_entries=8, ttl=60, backend=SQLiteBackend(path, 60, 64))
+    writer.put("a", 1)
+    clock.now += 50
+    assert reader.get("a") == 1  # copied locally with 10 s left, not a fresh 60 s
+    clock.now += 11
+    assert reader.get("a") is None
@@ -0,0 +1,118 @@
+# ==============================================================
+#  Stage Timers
+#
+# `stage(name)` times one step of a request (validation, waterfall,
+# breakeven, FAISS search, ...) into a Prometheus-style histogram and
+# onto the current request's trace. Work run on model executor workers
+# is timed there (traced_call) and the timings are recorded back in the
+# API process, so stages are counted once whatever the backend.
+#
+# Standard library only, so the finance engine and executor workers can
+# time their stages without importing the web stack; the routes,
+# middleware and GET /metrics rendering live in metrics.py.
+# ==============================================================
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BACKGROUND_ROUTE = "background"  # stages not tied to one request, e.g. a /search micro-batch
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, safe to observe from any thread."""
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [count per bucket (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for label_values, counts, total in series:
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total!r}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+STAGE_SECONDS = Histogram("finengine_stage_duration_seconds", "Time spent in each request stage in seconds",
+                          ("route", "stage"))
+
+
+# -------------------------------------------------------------- traces
+
+class Trace:
+    """Stage timings of one request (or of one executor call when `deferred`)."""
+
+    def __init__(self, route=BACKGROUND_ROUTE, deferred=False):
+        self.route = route
+        self.deferred = deferred  # collect only; the caller records the stages
+        self.stages = {}
+        self.endpoint_span = None
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def server_timing(self, total):
+        entries = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items()]
+        return ", ".join(entries + [f"total;dur={total * 1000:.3f}"])
+
+
+request_trace = contextvars.ContextVar("finengine_trace", default=None)
+
+
+def record(name, seconds):
+    """Adds a stage timing to the current trace and (unless deferred) its histogram."""
+    trace = request_trace.get()
+    if trace is not None:
+        trace.add(name, seconds)
+        if trace.deferred:
+            return
+    STAGE_SECONDS.observe(seconds, trace.route if trace is not None else BACKGROUND_ROUTE, name)
+
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def traced_call(fn, *args, **kwargs):
+    """Executor entry point: runs fn and returns (result, stage timings, run seconds)."""
+    token = request_trace.set(Trace(deferred=True))
+    start = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+        return result, request_trace.get().stages, time.perf_counter() - start
+    finally:
+        request_trace.reset(token)
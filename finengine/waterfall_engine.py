@@ -0,0 +1,161 @@
+# ==============================================================
+#  Vectorized Waterfall Engine
+#
+# The same year-by-year waterfall as FilmFinanceModel, written against
+# plain NumPy arrays so that many revenue vectors (scenarios, draws,
+# deals) are evaluated in one pass instead of one DataFrame per run.
+#
+# Every revenue, financing and waterfall term may be a scalar or an
+# array; they are broadcast together and the results carry the
+# broadcast shape as their leading dimensions.
+# ==============================================================
+
+import numpy as np
+
+from irr_solver import solve_irr
+
+LINE_ITEMS = [
+    'Net Receipts This Year', 'Less: Paid to Debt', 'Less: Paid to Equity Principal',
+    'Less: Paid to Equity Premium', 'Less: Paid to Deferrals', 'Investor Profit Share',
+    'Total Cash to Investor This Year'
+]
+
+FINANCING_KEYS = ('Equity_Investment', 'Debt_Financing', 'Gap_Financing')
+TERM_KEYS = (
+    'Equity_Premium_Percent', 'Net_Profit_Split_To_Investors', 'CAM_Setup_Fee', 'CAM_Fee_Percent',
+    'Distribution_Fee_Domestic_Percent', 'Distribution_Fee_Foreign_Percent',
+    'sa_commission_domestic_percent', 'sa_commission_foreign_percent',
+    'sa_commission_foreign_deferral_percent', 'Gap_Financing_Premium_Percent',
+    'Talent_Deferrals', 'Other_Deferrals'
+)
+
+
+def _arr(value):
+    return np.asarray(value, dtype=float)
+
+
+def stack_deal_terms(deals, keys):
+    """Stacks the given keys of many financing/terms dicts into 1-D arrays (one entry per deal)."""
+    return {k: np.array([deal[k] for deal in deals], dtype=float) for k in keys}
+
+
+def evaluate_waterfall(domestic, foreign, financing, terms, schedule, projection_years,
+                       other_revenue=0.0, compute_irr=True, line_items=True):
+    """
+    Runs the investor waterfall for broadcastable revenue/term arrays.
+
+    `schedule` is the revenue recognition schedule; its last axis is the
+    recognition year, any leading axes broadcast with the revenue inputs.
+    Returns a dict of arrays: roi, irr, cash_flow (..., projection_years),
+    total_return, gross_receipts and, if requested, annual_waterfall
+    (..., len(LINE_ITEMS), n_schedule_years).
+    """
+    domestic, foreign, other_revenue = _arr(domestic), _arr(foreign), _arr(other_revenue)
+    schedule = np.atleast_1d(_arr(schedule))
+    n_years = schedule.shape[-1]
+    if n_years > projection_years - 1:
+        raise ValueError(
+            f"revenue_recognition_schedule has {n_years} years but projection_years={projection_years} "
+            f"only leaves room for {projection_years - 1}"
+        )
+
+    equity_principal = _arr(financing['Equity_Investment'])
+    equity_premium = equity_principal * _arr(terms['Equity_Premium_Percent'])
+    debt_outstanding = (_arr(financing['Gap_Financing']) * (1 + _arr(terms['Gap_Financing_Premium_Percent']))
+                        + _arr(financing['Debt_Financing']))
+    foreign_comm_total = foreign * _arr(terms['sa_commission_foreign_percent'])
+    foreign_comm_deferred = foreign_comm_total * _arr(terms['sa_commission_foreign_deferral_percent'])
+    deferrals_outstanding = (_arr(terms['Talent_Deferrals']) + _arr(terms['Other_Deferrals'])
+                             + foreign_comm_deferred)
+
+    gross_receipts = domestic + foreign + other_revenue
+    cam_fee = _arr(terms['CAM_Setup_Fee']) + gross_receipts * _arr(terms['CAM_Fee_Percent'])
+    dist_exp = (domestic * _arr(terms['Distribution_Fee_Domestic_Percent']) +
+                foreign * _arr(terms['Distribution_Fee_Foreign_Percent']))
+    domestic_comm = domestic * _arr(terms['sa_commission_domestic_percent'])
+    foreign_comm_upfront = foreign_comm_total - foreign_comm_deferred
+    total_upfront_fees = cam_fee + dist_exp + domestic_comm + foreign_comm_upfront
+    total_net_receipts = gross_receipts - total_upfront_fees
+    profit_split = _arr(terms['Net_Profit_Split_To_Investors'])
+
+    shape = np.broadcast_shapes(
+        total_net_receipts.shape, schedule.shape[:-1], equity_principal.shape, equity_premium.shape,
+        debt_outstanding.shape, deferrals_outstanding.shape, profit_split.shape
+    )
+    debt_outstanding = np.broadcast_to(debt_outstanding, shape).copy()
+    principal_outstanding = np.broadcast_to(equity_principal, shape).copy()
+    premium_outstanding = np.broadcast_to(equity_premium, shape).copy()
+    deferrals_outstanding = np.broadcast_to(deferrals_outstanding, shape).copy()
+
+    cash_flow = np.zeros(shape + (projection_years,))
+    cash_flow[..., 0] = -equity_principal
+    annual = np.zeros(shape + (len(LINE_ITEMS), n_years)) if line_items else None
+
+    for i in range(n_years):
+        receipts = total_net_receipts * schedule[..., i]
+        net_receipts = receipts
+
+        paid_to_debt = np.minimum(receipts, debt_outstanding)
+        debt_outstanding -= paid_to_debt
+        receipts = receipts - paid_to_debt
+
+        paid_to_principal = np.minimum(receipts, principal_outstanding)
+        principal_outstanding -= paid_to_principal
+        receipts = receipts - paid_to_principal
+
+        paid_to_premium = np.minimum(receipts, premium_outstanding)
+        premium_outstanding -= paid_to_premium
+        receipts = receipts - paid_to_premium
+
+        paid_to_deferrals = np.minimum(receipts, deferrals_outstanding)
+        deferrals_outstanding -= paid_to_deferrals
+        receipts = receipts - paid_to_deferrals
+
+        investor_profit_share = receipts * profit_split
+        cash_flow[..., i + 1] = paid_to_principal + paid_to_premium + investor_profit_share
+
+        if annual is not None:
+            annual[..., 0, i] = net_receipts
+            annual[..., 1, i] = -paid_to_debt
+            annual[..., 2, i] = -paid_to_principal
+            annual[..., 3, i] = -paid_to_premium
+            annual[..., 4, i] = -paid_to_deferrals
+            annual[..., 5, i] = investor_profit_share
+            annual[..., 6, i] = cash_flow[..., i + 1]
+
+    total_return = cash_flow[..., 1:].sum(axis=-1)
+    equity_principal = np.broadcast_to(equity_principal, shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.where(equity_principal > 0, (total_return - equity_principal) / equity_principal, 0.0)
+
+    result = {'roi': roi, 'cash_flow': cash_flow, 'total_return': total_return,
+              'gross_receipts': np.broadcast_to(gross_receipts, shape)}
+    if compute_irr:
+        result['irr'] = cash_flow_irr(cash_flow, total_return)
+    if annual is not None:
+        result['annual_waterfall'] = annual
+    return result
+
+
+def cash_flow_irr(cash_flow, total_return):
+    """
+    IRR per cash-flow row (vectorized, see irr_solver), -1.0 where the
+    investor gets nothing back and NaN where no rate exists.
+    """
+    cash_flow = np.asarray(cash_flow, dtype=float)
+    flat_cf = cash_flow.reshape(-1, cash_flow.shape[-1])
+    flat_total = np.broadcast_to(total_return, cash_flow.shape[:-1]).reshape(-1)
+    irr = np.full(flat_total.shape, -1.0)
+    rows = np.flatnonzero(flat_total > 0)
+    irr[rows] = solve_irr(flat_cf[rows])
+    return irr.reshape(cash_flow.shape[:-1])
+
+
+def annual_waterfall_df(annual_waterfall):
+    """Builds the line-item x year DataFrame for a single waterfall result."""
+    import pandas as pd
+    annual_waterfall = np.asarray(annual_waterfall)
+    return pd.DataFrame(
+        annual_waterfall, index=LINE_ITEMS,
+        columns=[f'Year {i+1}' for i in range(annual_waterfall.shape[-1])]
+    )